@@ -1,4 +1,5 @@
-from functools import lru_cache
+import hmac
+from functools import cached_property, lru_cache
 
 from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -9,6 +10,10 @@ class Settings(BaseSettings):
     jwt_secret: str = Field(..., alias="JWT_SECRET")
     mongodb_uri: str = Field(default="mongodb://localhost:27017", alias="MONGODB_URI")
     mongodb_db: str = Field(default="ptud2", alias="MONGODB_DB")
+    mongodb_max_pool_size: int = Field(default=200, alias="MONGODB_MAX_POOL_SIZE")
+    mongodb_min_pool_size: int = Field(default=10, alias="MONGODB_MIN_POOL_SIZE")
+    mongodb_max_idle_time_ms: int = Field(default=300_000, alias="MONGODB_MAX_IDLE_TIME_MS")
+    mongodb_wait_queue_timeout_ms: int = Field(default=2_000, alias="MONGODB_WAIT_QUEUE_TIMEOUT_MS")
     debug: bool = Field(default=True)
     app_name: str = Field(default="AI Product Description Generator")
     cors_allow_origins: list[str] = Field(default_factory=lambda: ["http://localhost:3000"], alias="CORS_ALLOW_ORIGINS")
@@ -56,6 +61,32 @@ class Settings(BaseSettings):
             return ["http://localhost:3000"]
         return value
 
+    # Payment secrets pre-encoded once for HMAC signing.
+    @cached_property
+    def momo_secret_key_bytes(self) -> bytes:
+        return (self.momo_secret_key or "").encode("utf-8")
+
+    @cached_property
+    def momo_ipn_secret_bytes(self) -> bytes:
+        return (self.momo_ipn_secret or self.momo_secret_key or "").encode("utf-8")
+
+    @cached_property
+    def vnpay_hash_secret_bytes(self) -> bytes:
+        return (self.vnpay_hash_secret or "").encode("utf-8")
+
+    # Keyed HMAC prototypes; signers copy() them to skip the per-call key setup.
+    @cached_property
+    def momo_hmac(self) -> hmac.HMAC:
+        return hmac.new(self.momo_secret_key_bytes, digestmod="sha256")
+
+    @cached_property
+    def momo_ipn_hmac(self) -> hmac.HMAC:
+        return hmac.new(self.momo_ipn_secret_bytes, digestmod="sha256")
+
+    @cached_property
+    def vnpay_hmac(self) -> hmac.HMAC:
+        return hmac.new(self.vnpay_hash_secret_bytes, digestmod="sha512")
+
 
 @lru_cache()
 def get_settings() -> Settings:
@@ -1,26 +1,55 @@
 """MongoDB connection utilities and helpers."""
 
+import logging
 from typing import Optional
 
 from pymongo import ASCENDING, DESCENDING, MongoClient
+from pymongo.collection import Collection
 from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
 
 from ..config import get_settings
 
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 _client: Optional[MongoClient] = None
+_database: Optional[Database] = None
 
 
 def get_client() -> MongoClient:
     global _client
     if _client is None:
-        _client = MongoClient(settings.mongodb_uri)
+        _client = MongoClient(
+            settings.mongodb_uri,
+            maxPoolSize=settings.mongodb_max_pool_size,
+            minPoolSize=settings.mongodb_min_pool_size,
+            maxIdleTimeMS=settings.mongodb_max_idle_time_ms,
+            waitQueueTimeoutMS=settings.mongodb_wait_queue_timeout_ms,
+            retryWrites=True,
+        )
     return _client
 
 
 def get_database() -> Database:
-    return get_client()[settings.mongodb_db]
+    global _database
+    if _database is None:
+        _database = get_client()[settings.mongodb_db]
+    return _database
+
+
+def _create_unique_index(coll: Collection, keys, **kwargs) -> None:
+    """Create a unique index, but keep starting up if existing data violates it."""
+    try:
+        coll.create_index(keys, unique=True, **kwargs)
+    except DuplicateKeyError as exc:
+        logger.warning(
+            "Unique index %r on %s not created: existing documents have duplicate values (%s). "
+            "Deduplicate them and restart to enforce it.",
+            keys,
+            coll.name,
+            exc.details.get("keyValue") if exc.details else exc,
+        )
 
 
 def init_db() -> None:
@@ -46,11 +75,18 @@ def init_db() -> None:
     addresses = db.get_collection("addresses")
     addresses.create_index("user_id")
     addresses.create_index([("user_id", ASCENDING), ("is_default", DESCENDING)])
+    addresses.create_index([("user_id", ASCENDING), ("is_default", DESCENDING), ("updated_at", DESCENDING)])
+    addresses.create_index(
+        [("user_id", ASCENDING), ("is_default", ASCENDING)],
+        name="address_default_per_user",
+        partialFilterExpression={"is_default": True},
+    )
 
     sellers = db.get_collection("sellers")
     sellers.create_index("user_id", unique=True, sparse=True)
     sellers.create_index("slug", unique=True)
     sellers.create_index("status")
+    sellers.create_index([("status", ASCENDING), ("created_at", DESCENDING)])
 
     categories = db.get_collection("categories")
     categories.create_index("slug", unique=True)
@@ -84,17 +120,24 @@ def init_db() -> None:
     favorites.create_index([("user_id", ASCENDING), ("product_id", ASCENDING)], unique=True)
 
     orders = db.get_collection("orders")
+    _create_unique_index(orders, "order_code")
     orders.create_index("buyer_id")
     orders.create_index("seller_id")
     orders.create_index("payment_status")
     orders.create_index("fulfillment_status")
     orders.create_index("created_at")
+    orders.create_index([("seller_id", ASCENDING), ("created_at", DESCENDING)])
+    orders.create_index([("seller_id", ASCENDING), ("payment_status", ASCENDING)])
 
     payments = db.get_collection("payments")
     payments.create_index("order_id")
     payments.create_index("provider")
     payments.create_index("status")
     payments.create_index("order_code")
+    payments.create_index(
+        [("order_code", ASCENDING), ("provider", ASCENDING), ("request_id", ASCENDING)],
+        name="payment_webhook_lookup",
+    )
 
     shipments = db.get_collection("shipments")
     shipments.create_index("order_id")
@@ -126,9 +169,12 @@ def init_db() -> None:
         unique=True,
     )
     chat_threads.create_index("last_message_at")
+    chat_threads.create_index([("buyer_id", ASCENDING), ("updated_at", DESCENDING)])
+    chat_threads.create_index([("seller_id", ASCENDING), ("updated_at", DESCENDING)])
 
     chat_messages = db.get_collection("chat_messages")
     chat_messages.create_index("thread_id")
+    chat_messages.create_index([("thread_id", ASCENDING), ("created_at", DESCENDING)])
     chat_messages.create_index("sender_id")
     chat_messages.create_index("created_at")
     chat_messages.create_index("order_id")
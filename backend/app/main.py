@@ -7,9 +7,11 @@ from typing import Optional
 from uuid import uuid4
 
 from fastapi import Depends, FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
+import httpx
 from PIL import Image, UnidentifiedImageError
 from pymongo.collection import Collection
 from pymongo.database import Database
@@ -31,21 +33,25 @@ from .schemas import (
     UserCreate,
     UserOut,
 )
+from .modules.common.responses import ORJSONResponse
+from .modules.common.types import object_id_exception_handler
 from .modules.common.utils import is_email, is_phone_number, normalize_email, utcnow
 from .modules.users.dependencies import (
     find_user_by_identifier,
     get_current_user,
     get_current_user_optional,
+    invalidate_cached_user,
     require_admin,
     token_subject,
     users_collection,
 )
 from .realtime.chat_namespace import ChatNamespace
-from .realtime.manager import set_socket_server
+from .realtime.manager import ORJSONCodec, set_socket_server
 from .services import auth, content, email as email_service, history as history_service
 from .services import cloudinary_service
 
-app = FastAPI(title="AI Product Description Service")
+app = FastAPI(title="AI Product Description Service", default_response_class=ORJSONResponse)
+app.add_exception_handler(RequestValidationError, object_id_exception_handler)
 
 BASE_STATIC_DIR = Path(__file__).resolve().parent.parent / "static"
 IMAGES_DIR = BASE_STATIC_DIR / "images"
@@ -77,6 +83,15 @@ def _user_out(user: UserDocument) -> UserOut:
 def on_startup() -> None:
     init_db()
     seed_admin_user()
+    # Shared client for payment gateways so outbound calls don't block a worker thread;
+    # keep-alive and HTTP/2 let concurrent initiations reuse one TLS session.
+    # ``app`` is rebound to the Socket.IO wrapper below, so the FastAPI instance is
+    # addressed explicitly; routes reach it as ``request.app.state.http``.
+    fastapi_app.state.http = httpx.AsyncClient(
+        timeout=15.0,
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=32),
+    )
     
     # Configure Cloudinary
     settings = get_settings()
@@ -88,6 +103,11 @@ def on_startup() -> None:
         )
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    await fastapi_app.state.http.aclose()
+
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -170,8 +190,14 @@ def login(payload: UserCreate, db: Database = Depends(get_database)) -> TokenRes
 
     user = find_user_by_identifier(db, identifier)
 
-    if not user or not auth.verify_password(payload.password, user["hashed_password"]):
+    if not user:
+        auth.dummy_verify_password(payload.password)
+        raise HTTPException(status_code=401, detail="Th├┤ng tin ─æ─âng nhß║¡p kh├┤ng ch├¡nh x├íc")
+    verified, new_hash = auth.verify_and_update_password(payload.password, user["hashed_password"])
+    if not verified:
         raise HTTPException(status_code=401, detail="Th├┤ng tin ─æ─âng nhß║¡p kh├┤ng ch├¡nh x├íc")
+    if new_hash:
+        users.update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
 
     token = auth.create_access_token(token_subject(user))
     return TokenResponse(access_token=token)
@@ -252,6 +278,7 @@ def reset_password(
         {"_id": user["_id"]},
         {"$set": {"hashed_password": auth.hash_password(payload.new_password)}},
     )
+    invalidate_cached_user(user["_id"])
     tokens.update_one({"_id": token_entry["_id"]}, {"$set": {"used": True}})
 
     return MessageResponse(message="Mß║¡t khß║⌐u ─æ├ú ─æ╞░ß╗úc ─æß║╖t lß║íi th├ánh c├┤ng.")
@@ -278,6 +305,7 @@ def change_password(
         {"_id": user["_id"]},
         {"$set": {"hashed_password": auth.hash_password(payload.new_password)}},
     )
+    invalidate_cached_user(user["_id"])
 
     return MessageResponse(message="─É├ú ─æß╗òi mß║¡t khß║⌐u th├ánh c├┤ng.")
 
@@ -447,6 +475,7 @@ socket_server = socketio.AsyncServer(
     ping_timeout=60,
     logger=False,
     engineio_logger=False,
+    json=ORJSONCodec,
 )
 socket_server.register_namespace(ChatNamespace("/ws/chat"))
 set_socket_server(socket_server)
@@ -12,7 +12,7 @@ from pymongo.database import Database
 
 from ...db.session import get_database
 from ..common.utils import utcnow
-from ..users.dependencies import require_admin, users_collection
+from ..users.dependencies import invalidate_cached_user, require_admin, users_collection
 from .schemas import AdminUserResponse, UpdateUserRoleRequest
 
 router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_admin)])
@@ -72,4 +72,5 @@ def admin_update_user_role(
     )
     if not doc:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Người dùng không tồn tại")
+    invalidate_cached_user(user_oid)
     return _user_to_admin_response(doc)
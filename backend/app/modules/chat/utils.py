@@ -46,3 +46,36 @@ def message_response_from_doc(doc: Dict[str, Any]) -> ChatMessageResponse:
     }
     return ChatMessageResponse.model_validate(payload)
 
+
+
+def _iso(value: Any) -> str | None:
+    return value.isoformat() if isinstance(value, datetime) else None
+
+
+# JSON-ready builders for the realtime layer: same shape as
+# ``model_dump(mode="json")`` of the response models, without the Pydantic round-trip.
+def thread_dict_from_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": _to_str(doc.get("_id")),
+        "order_id": _to_str(doc.get("order_id")),
+        "buyer_id": _to_str(doc.get("buyer_id")),
+        "seller_id": _to_str(doc.get("seller_id")),
+        "last_message_preview": doc.get("last_message_preview"),
+        "last_message_at": _iso(doc.get("last_message_at")),
+        "created_at": _iso(doc.get("created_at")),
+        "updated_at": _iso(doc.get("updated_at")),
+    }
+
+
+def message_dict_from_doc(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": _to_str(doc.get("_id")),
+        "thread_id": _to_str(doc.get("thread_id")),
+        "order_id": _to_str(doc.get("order_id")),
+        "sender_id": _to_str(doc.get("sender_id")),
+        "message_type": doc.get("message_type", "text"),
+        "content": doc.get("content", ""),
+        "attachments": doc.get("attachments", []) or [],
+        "is_read": bool(doc.get("is_read", False)),
+        "created_at": _iso(doc.get("created_at")),
+    }
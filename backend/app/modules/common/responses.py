@@ -0,0 +1,51 @@
+"""Response classes shared across modules."""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator
+
+import orjson
+from bson import Decimal128, ObjectId
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """Serialise Mongo-specific types orjson does not handle natively."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, Decimal128):
+        return float(value.to_decimal())
+    raise TypeError
+
+
+class ORJSONResponse(JSONResponse):
+    """JSON response rendered by orjson, able to take raw Mongo documents."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NAIVE_UTC)
+
+
+class PydanticResponse(JSONResponse):
+    """JSON response rendered by the model's own pydantic-core serializer."""
+
+    def render(self, content: BaseModel) -> bytes:
+        return content.model_dump_json(by_alias=True).encode("utf-8")
+
+
+def _iter_json_array(items: Iterable[Any]) -> Iterator[bytes]:
+    yield b"["
+    separator = b""
+    for item in items:
+        yield separator
+        yield orjson.dumps(item, default=_default, option=orjson.OPT_NAIVE_UTC)
+        separator = b","
+    yield b"]"
+
+
+class ORJSONArrayStreamingResponse(StreamingResponse):
+    """JSON array streamed element by element, e.g. straight off a Mongo cursor."""
+
+    def __init__(self, items: Iterable[Any], **kwargs: Any) -> None:
+        kwargs.setdefault("media_type", "application/json")
+        super().__init__(_iter_json_array(items), **kwargs)
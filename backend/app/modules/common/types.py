@@ -0,0 +1,49 @@
+"""Pydantic types shared across modules."""
+
+from functools import partial
+from typing import Annotated, Any
+
+from bson import ObjectId
+from fastapi import Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, Response
+from pydantic import PlainSerializer, PlainValidator, WithJsonSchema
+from pydantic_core import PydanticCustomError
+
+from .utils import is_object_id
+
+OBJECT_ID_ERROR = "object_id"
+
+
+def _to_object_id(value: Any, detail: str) -> ObjectId:
+    if isinstance(value, ObjectId):
+        return value
+    if not isinstance(value, str) or not is_object_id(value):
+        raise PydanticCustomError(OBJECT_ID_ERROR, "{detail}", {"detail": detail})
+    return ObjectId(value)
+
+
+def object_id_detail(detail: str) -> PlainValidator:
+    """Validator for a ``PathObjectId`` whose 400 message differs from the default."""
+    return PlainValidator(partial(_to_object_id, detail=detail))
+
+
+# Path/query parameter given as a 24-hex string and converted to an ObjectId at
+# parse time. Invalid values get a 400 with the localized detail (see
+# ``object_id_exception_handler``); override it with
+# ``Annotated[PathObjectId, object_id_detail("...")]``.
+PathObjectId = Annotated[
+    ObjectId,
+    object_id_detail("ID không hợp lệ"),
+    PlainSerializer(str, return_type=str),
+    WithJsonSchema({"type": "string", "pattern": "^[0-9a-fA-F]{24}$"}),
+]
+
+
+async def object_id_exception_handler(request: Request, exc: RequestValidationError) -> Response:
+    """Answer malformed ObjectIds with the 400 the routers used to raise themselves."""
+    for error in exc.errors():
+        if error.get("type") == OBJECT_ID_ERROR:
+            return JSONResponse(status_code=400, content={"detail": error["ctx"]["detail"]})
+    return await request_validation_exception_handler(request, exc)
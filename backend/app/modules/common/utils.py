@@ -6,6 +6,7 @@ from datetime import datetime, timezone
 
 EMAIL_REGEX = re.compile(r"^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$")
 PHONE_REGEX = re.compile(r"^[0-9]{10,11}$")
+OBJECT_ID_REGEX = re.compile(r"^[0-9a-fA-F]{24}$")
 
 
 def is_email(identifier: str) -> bool:
@@ -18,6 +19,11 @@ def is_phone_number(identifier: str) -> bool:
     return bool(PHONE_REGEX.match(identifier or ""))
 
 
+def is_object_id(value: str) -> bool:
+    """Return True if the string is a 24-character hex ObjectId."""
+    return isinstance(value, str) and bool(OBJECT_ID_REGEX.match(value))
+
+
 def normalize_email(email: str) -> str:
     """Normalize email strings before saving/searching."""
     return (email or "").strip().lower()
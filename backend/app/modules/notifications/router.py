@@ -3,10 +3,12 @@
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from pydantic import TypeAdapter
 from pymongo.database import Database
 
 from ...db.models import UserDocument
 from ...db.session import get_database
+from ..common.responses import PydanticResponse
 from ..users.dependencies import get_current_user
 from . import service
 from .schemas import (
@@ -23,6 +25,23 @@ DEFAULT_EVENTS = ["order_created", "order_processing", "order_shipping", "order_
 
 router = APIRouter(prefix="/notifications", tags=["notifications"])
 
+_NOTIFICATION_LIST_ADAPTER = TypeAdapter(list[NotificationResponse])
+
+
+def _notification_payload(doc: dict) -> dict:
+    return {
+        "_id": str(doc["_id"]),
+        "user_id": str(doc["user_id"]),
+        "type": doc.get("type", ""),
+        "title": doc.get("title", ""),
+        "message": doc.get("message", ""),
+        "metadata": doc.get("metadata") or {},
+        "is_read": bool(doc.get("is_read", False)),
+        "created_at": doc.get("created_at"),
+        "read_at": doc.get("read_at"),
+    }
+
+
 def _preference_to_response(doc: dict) -> NotificationPreferenceResponse:
     payload = {
         "event_type": doc.get("event_type", ""),
@@ -34,19 +53,22 @@ def _preference_to_response(doc: dict) -> NotificationPreferenceResponse:
     return NotificationPreferenceResponse.model_validate(payload)
 
 
-@router.get("", response_model=NotificationListResponse)
+@router.get(
+    "",
+    response_model=None,
+    responses={200: {"model": NotificationListResponse}},
+)
 def list_notifications(
     unread_only: bool = Query(default=False),
     limit: int = Query(default=50, ge=1, le=200),
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> NotificationListResponse:
+) -> PydanticResponse:
     docs = service.list_notifications(db, current_user["_id"], unread_only=unread_only, limit=limit)
     unread_count = service.get_unread_count(db, current_user["_id"])
-    return NotificationListResponse(
-        items=[_notification_to_response(doc) for doc in docs],
-        unread_count=unread_count,
-    )
+    items = _NOTIFICATION_LIST_ADAPTER.validate_python(_notification_payload(doc) for doc in docs)
+    payload = NotificationListResponse.model_construct(items=items, unread_count=unread_count)
+    return PydanticResponse(content=payload)
 
 
 @router.post(
@@ -77,11 +99,15 @@ def mark_all_notifications_read(
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.get("/preferences", response_model=NotificationPreferenceListResponse)
+@router.get(
+    "/preferences",
+    response_model=None,
+    responses={200: {"model": NotificationPreferenceListResponse}},
+)
 def get_preferences(
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> NotificationPreferenceListResponse:
+) -> PydanticResponse:
     stored = service.list_preferences(db, current_user["_id"])
     pref_map = { (pref.get("event_type"), pref.get("channel", "in_app")): pref for pref in stored }
 
@@ -103,15 +129,21 @@ def get_preferences(
         if key[0] not in DEFAULT_EVENTS or key[1] != "in_app":
             items.append(pref)
 
-    return NotificationPreferenceListResponse(items=[_preference_to_response(pref) for pref in items])
+    return PydanticResponse(
+        content=NotificationPreferenceListResponse(items=[_preference_to_response(pref) for pref in items])
+    )
 
 
-@router.put("/preferences", response_model=NotificationPreferenceResponse)
+@router.put(
+    "/preferences",
+    response_model=None,
+    responses={200: {"model": NotificationPreferenceResponse}},
+)
 def update_preference(
     payload: NotificationPreferenceUpdateRequest,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> NotificationPreferenceResponse:
+) -> PydanticResponse:
     if payload.channel not in ALLOWED_CHANNELS:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Channel is not supported")
     pref = service.upsert_preference(
@@ -121,6 +153,6 @@ def update_preference(
         channel=payload.channel,
         enabled=payload.enabled,
     )
-    return _preference_to_response(pref)
+    return PydanticResponse(content=_preference_to_response(pref))
 
 
@@ -2,19 +2,37 @@
 
 from __future__ import annotations
 
-from typing import Optional
+from datetime import datetime
+from threading import Lock
+from typing import Optional, TypedDict
 
 from bson import ObjectId
+from cachetools import TTLCache
 from fastapi import HTTPException, status
 from pymongo.collection import Collection
+from pymongo.cursor import Cursor
 from pymongo.database import Database
 
 from ...db.models import NotificationDocument, NotificationPreferenceDocument
-from ..common.utils import utcnow
+from ..common.utils import is_object_id, utcnow
 
 DEFAULT_CHANNEL = "in_app"
 DEFAULT_EVENT_ALL = "__all__"
 
+# Preferences change rarely, so resolved (user_id, event_type, channel) -> enabled
+# lookups are kept per process for a minute.
+_PREF_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_PREF_CACHE_LOCK = Lock()
+
+
+class NotificationSpec(TypedDict, total=False):
+    user_id: ObjectId
+    notification_type: str
+    title: str
+    message: str
+    metadata: Optional[dict]
+    channel: str
+
 
 def notifications_collection(db: Database) -> Collection:
     return db.get_collection("notifications")
@@ -25,10 +43,18 @@ def preferences_collection(db: Database) -> Collection:
 
 
 def _parse_object_id(value: str, label: str) -> ObjectId:
-    try:
-        return ObjectId(value)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{label} is invalid") from exc
+    if not is_object_id(value):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{label} is invalid")
+    return ObjectId(value)
+
+
+def _is_enabled(prefs: dict, user_id: ObjectId, event_type: str, channel: str) -> bool:
+    pref = prefs.get((user_id, event_type, channel))
+    if pref is None:
+        pref = prefs.get((user_id, DEFAULT_EVENT_ALL, channel))
+    if pref is None:
+        return True
+    return bool(pref.get("enabled", True))
 
 
 def _should_send_notification(
@@ -37,32 +63,44 @@ def _should_send_notification(
     event_type: str,
     channel: str,
 ) -> bool:
-    pref = preferences_collection(db).find_one(
-        {"user_id": user_id, "event_type": event_type, "channel": channel}
-    )
-    if pref is None:
-        pref = preferences_collection(db).find_one(
-            {"user_id": user_id, "event_type": DEFAULT_EVENT_ALL, "channel": channel}
+    key = (user_id, event_type, channel)
+    with _PREF_CACHE_LOCK:
+        cached = _PREF_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    prefs = {
+        (pref["user_id"], pref["event_type"], pref["channel"]): pref
+        for pref in preferences_collection(db).find(
+            {"user_id": user_id, "event_type": {"$in": [event_type, DEFAULT_EVENT_ALL]}, "channel": channel}
         )
-    if pref is None:
-        return True
-    return bool(pref.get("enabled", True))
+    }
+    enabled = _is_enabled(prefs, user_id, event_type, channel)
+    with _PREF_CACHE_LOCK:
+        _PREF_CACHE[key] = enabled
+    return enabled
 
 
-def create_notification(
-    db: Database,
+def _invalidate_preference_cache(user_id: ObjectId, event_type: str, channel: str) -> None:
+    with _PREF_CACHE_LOCK:
+        if event_type == DEFAULT_EVENT_ALL:
+            # The catch-all preference backs every cached event of this user/channel.
+            stale = [key for key in _PREF_CACHE.keys() if key[0] == user_id and key[2] == channel]
+        else:
+            stale = [(user_id, event_type, channel)]
+        for key in stale:
+            _PREF_CACHE.pop(key, None)
+
+
+def _build_notification(
     user_id: ObjectId,
     notification_type: str,
     title: str,
     message: str,
-    metadata: Optional[dict] = None,
-    channel: str = DEFAULT_CHANNEL,
-) -> Optional[NotificationDocument]:
-    if not _should_send_notification(db, user_id, notification_type, channel):
-        return None
-
-    now = utcnow()
-    doc: NotificationDocument = {
+    metadata: Optional[dict],
+    now: datetime,
+) -> NotificationDocument:
+    return {
         "user_id": user_id,
         "type": notification_type,
         "title": title,
@@ -72,27 +110,96 @@ def create_notification(
         "created_at": now,
         "read_at": None,
     }
+
+
+def create_notification(
+    db: Database,
+    user_id: ObjectId,
+    notification_type: str,
+    title: str,
+    message: str,
+    metadata: Optional[dict] = None,
+    channel: str = DEFAULT_CHANNEL,
+) -> Optional[NotificationDocument]:
+    if not _should_send_notification(db, user_id, notification_type, channel):
+        return None
+
+    doc = _build_notification(user_id, notification_type, title, message, metadata, utcnow())
     result = notifications_collection(db).insert_one(doc)
     doc["_id"] = result.inserted_id  # type: ignore[index]
     return doc
 
 
+def create_notifications_bulk(db: Database, specs: list[NotificationSpec]) -> list[NotificationDocument]:
+    """Create several notifications with at most one preference query and one insert."""
+    if not specs:
+        return []
+
+    enabled: dict[tuple, bool] = {}
+    misses: list[tuple] = []
+    with _PREF_CACHE_LOCK:
+        for spec in specs:
+            key = (spec["user_id"], spec["notification_type"], spec.get("channel", DEFAULT_CHANNEL))
+            cached = _PREF_CACHE.get(key)
+            if cached is None:
+                misses.append(key)
+            else:
+                enabled[key] = cached
+
+    if misses:
+        event_types = {key[1] for key in misses}
+        event_types.add(DEFAULT_EVENT_ALL)
+        prefs = {
+            (pref["user_id"], pref["event_type"], pref["channel"]): pref
+            for pref in preferences_collection(db).find(
+                {
+                    "user_id": {"$in": list({key[0] for key in misses})},
+                    "event_type": {"$in": list(event_types)},
+                    "channel": {"$in": list({key[2] for key in misses})},
+                }
+            )
+        }
+        with _PREF_CACHE_LOCK:
+            for key in misses:
+                enabled[key] = _PREF_CACHE[key] = _is_enabled(prefs, *key)
+
+    now = utcnow()
+    docs: list[NotificationDocument] = []
+    for spec in specs:
+        if not enabled[(spec["user_id"], spec["notification_type"], spec.get("channel", DEFAULT_CHANNEL))]:
+            continue
+        docs.append(
+            _build_notification(
+                spec["user_id"],
+                spec["notification_type"],
+                spec["title"],
+                spec["message"],
+                spec.get("metadata"),
+                now,
+            )
+        )
+
+    if docs:
+        # insert_many fills in each document's _id.
+        notifications_collection(db).insert_many(docs, ordered=False)
+    return docs
+
+
 def list_notifications(
     db: Database,
     user_id: ObjectId,
     unread_only: bool = False,
     limit: int = 50,
-) -> list[NotificationDocument]:
+) -> Cursor:
     query = {"user_id": user_id}
     if unread_only:
         query["is_read"] = False
-    notifications = (
+    return (
         notifications_collection(db)
         .find(query)
         .sort("created_at", -1)
         .limit(limit)
     )
-    return list(notifications)
 
 
 def get_unread_count(db: Database, user_id: ObjectId) -> int:
@@ -120,9 +227,8 @@ def mark_all_read(db: Database, user_id: ObjectId) -> int:
     return result.modified_count
 
 
-def list_preferences(db: Database, user_id: ObjectId) -> list[NotificationPreferenceDocument]:
-    prefs = preferences_collection(db).find({"user_id": user_id})
-    return list(prefs)
+def list_preferences(db: Database, user_id: ObjectId) -> Cursor:
+    return preferences_collection(db).find({"user_id": user_id})
 
 
 def upsert_preference(
@@ -147,6 +253,7 @@ def upsert_preference(
         },
         upsert=True,
     )
+    _invalidate_preference_cache(user_id, event_type, channel)
     pref = preferences_collection(db).find_one(filter_doc)
     assert pref is not None
     return pref  # type: ignore[return-value]
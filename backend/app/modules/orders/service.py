@@ -3,13 +3,17 @@
 
 from __future__ import annotations
 
+import time
+from secrets import token_hex
 from typing import Optional
 
 from bson import ObjectId
 from fastapi import HTTPException, status
 from pymongo import ReturnDocument
 from pymongo.collection import Collection
+from pymongo.cursor import Cursor
 from pymongo.database import Database
+from pymongo.errors import DuplicateKeyError
 
 from ..notifications import service as notifications_service
 from ..cart import service as cart_service
@@ -17,14 +21,60 @@ from ..catalog import service as catalog_service
 from ..common.utils import utcnow
 from ..users import service as user_service
 
+CANCELLABLE_STATUSES = ["pending_confirmation", "processing"]
+ADDRESS_SNAPSHOT_KEYS = (
+    "recipient_name",
+    "phone_number",
+    "address_line",
+    "ward",
+    "district",
+    "province",
+    "postal_code",
+    "country",
+)
+
+# Listing fields matching OrderResponse; buyer/seller ids, transaction ids and
+# timeline actors stay server-side.
+ORDER_LIST_PROJECTION = {
+    field: 1
+    for field in (
+        "order_code",
+        "payment_method",
+        "payment_status",
+        "fulfillment_status",
+        "subtotal_amount",
+        "shipping_fee",
+        "discount_amount",
+        "total_amount",
+        "note",
+        "address_snapshot",
+        "items.product_id",
+        "items.variant_id",
+        "items.product_name",
+        "items.sku",
+        "items.quantity",
+        "items.price",
+        "items.total_amount",
+        "items.thumbnail_url",
+        "items.attributes",
+        "timeline.status",
+        "timeline.note",
+        "timeline.created_at",
+        "created_at",
+        "updated_at",
+    )
+}
+
 
 def orders_collection(db: Database) -> Collection:
     return db.get_collection("orders")
 
 
 def _generate_order_code() -> str:
-    timestamp = utcnow().strftime("%Y%m%d%H%M%S%f")
-    return f"ORD-{timestamp}"
+    # Microsecond clock plus 32 random bits: pids and per-process counters repeat
+    # across containers, so uniqueness comes from the random part and the
+    # unique index on order_code, not from the host.
+    return f"ORD-{time.time_ns() // 1000:x}-{token_hex(4)}"
 
 
 def _ensure_single_seller(current: Optional[ObjectId], new_seller: Optional[ObjectId]) -> ObjectId:
@@ -109,19 +159,7 @@ def create_order_from_cart(
         "buyer_id": user["_id"],
         "seller_id": seller_id,
         "order_code": _generate_order_code(),
-        "address_snapshot": {
-            key: address_doc.get(key)
-            for key in [
-                "recipient_name",
-                "phone_number",
-                "address_line",
-                "ward",
-                "district",
-                "province",
-                "postal_code",
-                "country",
-            ]
-        },
+        "address_snapshot": {key: address_doc.get(key) for key in ADDRESS_SNAPSHOT_KEYS},
         "payment_method": payment_method,
         "payment_status": "pending",
         "fulfillment_status": "pending_confirmation",
@@ -144,47 +182,52 @@ def create_order_from_cart(
         "note": note,
     }
 
-    result = orders_collection(db).insert_one(order_doc)
+    try:
+        result = orders_collection(db).insert_one(order_doc)
+    except DuplicateKeyError as exc:
+        if "order_code" not in ((exc.details or {}).get("keyPattern") or {}):
+            raise
+        # A clash on the random order code is vanishingly rare: draw a new one once.
+        order_doc["order_code"] = _generate_order_code()
+        result = orders_collection(db).insert_one(order_doc)
     order_doc["_id"] = result.inserted_id
 
     cart_service.clear_cart(db, user["_id"])
 
-    notifications_service.create_notification(
-        db,
-        user["_id"],
-        notification_type="order_created",
-        title="Order created",
-        message=f"Order {order_doc['order_code']} has been created.",
-        metadata={"order_id": str(order_doc["_id"]), "order_code": order_doc["order_code"]},
-    )
+    specs: list[notifications_service.NotificationSpec] = [
+        {
+            "user_id": user["_id"],
+            "notification_type": "order_created",
+            "title": "Order created",
+            "message": f"Order {order_doc['order_code']} has been created.",
+            "metadata": {"order_id": str(order_doc["_id"]), "order_code": order_doc["order_code"]},
+        }
+    ]
     seller_id = order_doc.get("seller_id")
     if seller_id:
-        notifications_service.create_notification(
-            db,
-            seller_id,
-            notification_type="order_new",
-            title="New order received",
-            message=f"New order {order_doc['order_code']} is awaiting confirmation.",
-            metadata={"order_id": str(order_doc["_id"]), "order_code": order_doc["order_code"]},
+        specs.append(
+            {
+                "user_id": seller_id,
+                "notification_type": "order_new",
+                "title": "New order received",
+                "message": f"New order {order_doc['order_code']} is awaiting confirmation.",
+                "metadata": {"order_id": str(order_doc["_id"]), "order_code": order_doc["order_code"]},
+            }
         )
+    notifications_service.create_notifications_bulk(db, specs)
 
     return order_doc
 
 
-def list_orders(db: Database, user_id: ObjectId) -> list[OrderDocument]:
-    return list(
+def list_orders(db: Database, user_id: ObjectId) -> Cursor:
+    return (
         orders_collection(db)
-        .find({"buyer_id": user_id})
+        .find({"buyer_id": user_id}, ORDER_LIST_PROJECTION)
         .sort("created_at", -1)
     )
 
 
-def get_order(db: Database, user_id: ObjectId, order_id_str: str) -> OrderDocument:
-    try:
-        order_id = ObjectId(order_id_str)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="order_id không hợp lệ") from exc
-
+def get_order(db: Database, user_id: ObjectId, order_id: ObjectId) -> OrderDocument:
     order = orders_collection(db).find_one({"_id": order_id, "buyer_id": user_id})
     if not order:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy đơn hàng")
@@ -194,17 +237,16 @@ def get_order(db: Database, user_id: ObjectId, order_id_str: str) -> OrderDocume
 def cancel_order(
     db: Database,
     user_id: ObjectId,
-    order_id_str: str,
+    order_id: ObjectId,
     reason: Optional[str] = None,
 ) -> OrderDocument:
-    order = get_order(db, user_id, order_id_str)
-
-    if order.get("fulfillment_status") not in {"pending_confirmation", "processing"}:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Đơn hàng không thể hủy ở trạng thái hiện tại")
-
     now = utcnow()
     updated_order = orders_collection(db).find_one_and_update(
-        {"_id": order["_id"], "buyer_id": user_id},
+        {
+            "_id": order_id,
+            "buyer_id": user_id,
+            "fulfillment_status": {"$in": CANCELLABLE_STATUSES},
+        },
         {
             "$set": {
                 "fulfillment_status": "cancelled",
@@ -222,9 +264,13 @@ def cancel_order(
         },
         return_document=ReturnDocument.AFTER,
     )
-    if not updated_order:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy đơn hàng")
-    return updated_order
+    if updated_order:
+        return updated_order
+
+    # Only failed cancellations pay for a second lookup to pick the right error.
+    if orders_collection(db).count_documents({"_id": order_id, "buyer_id": user_id}, limit=1):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Đơn hàng không thể hủy ở trạng thái hiện tại")
+    raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy đơn hàng")
 
 
 def get_order_by_object_id(db: Database, order_id: ObjectId) -> OrderDocument:
@@ -307,19 +353,62 @@ def update_order_fulfillment_status(
     return updated_order
 
 
+def apply_payment_and_fulfillment(
+    db: Database,
+    order_id: ObjectId,
+    payment_status: str,
+    fulfillment_status: str,
+    note: Optional[str],
+    actor_id: Optional[ObjectId],
+) -> OrderDocument:
+    """Move payment and fulfillment status together with a single write."""
+    now = utcnow()
+    updated_order = orders_collection(db).find_one_and_update(
+        {"_id": order_id},
+        {
+            "$set": {
+                "payment_status": payment_status,
+                "fulfillment_status": fulfillment_status,
+                "updated_at": now,
+            },
+            "$push": {
+                "timeline": {
+                    "$each": [
+                        {
+                            "status": f"payment_{payment_status}",
+                            "note": note,
+                            "created_at": now,
+                            "actor_id": actor_id,
+                        },
+                        {
+                            "status": f"fulfillment_{fulfillment_status}",
+                            "note": note,
+                            "created_at": now,
+                            "actor_id": actor_id,
+                        },
+                    ]
+                }
+            },
+        },
+        return_document=ReturnDocument.AFTER,
+    )
+    if not updated_order:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy đơn hàng")
+    return updated_order
+
+
 def list_orders_for_seller(
     db: Database,
     seller_id: ObjectId,
     limit: int = 20,
     skip: int = 0,
-) -> list[OrderDocument]:
-    cursor = (
+) -> Cursor:
+    return (
         orders_collection(db)
-        .find({"seller_id": seller_id})
+        .find({"seller_id": seller_id}, ORDER_LIST_PROJECTION)
         .sort("created_at", -1)
         .skip(skip)
         .limit(limit)
     )
-    return list(cursor)
 
 
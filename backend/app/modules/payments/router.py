@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
+import orjson
 from fastapi import APIRouter, Depends, Request, status
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import PlainTextResponse
 from pymongo.database import Database
+from starlette.concurrency import run_in_threadpool
 
 from ...db.models import UserDocument
 from ...db.session import get_database
+from ..common.responses import ORJSONResponse
 from ..users.dependencies import get_current_user, require_buyer
 from . import service
 from .schemas import (
@@ -17,28 +20,29 @@ from .schemas import (
     VnPayPaymentResponse,
 )
 
-router = APIRouter(prefix="/payments", tags=["payments"])
+router = APIRouter(prefix="/payments", tags=["payments"], default_response_class=ORJSONResponse)
+
+_INITIATE_RESPONSE_MODELS = {"momo": MoMoPaymentResponse, "vnpay": VnPayPaymentResponse}
 
 
 @router.post("/initiate", response_model=MoMoPaymentResponse | VnPayPaymentResponse, status_code=status.HTTP_201_CREATED)
-def initiate_payment(
+async def initiate_payment(
     payload: PaymentInitiateRequest,
     request: Request,
     current_user: UserDocument = Depends(require_buyer),
     db: Database = Depends(get_database),
 ):
     client_ip = request.headers.get("x-forwarded-for", request.client.host if request.client else "127.0.0.1")
-    result = service.initiate_payment(
+    result = await service.initiate_payment(
         db=db,
         user=current_user,
         order_id_str=payload.order_id,
-        provider=payload.provider.lower(),
+        provider=payload.provider,
         redirect_url=payload.redirect_url,
+        http_client=request.app.state.http,
         client_ip=client_ip,
     )
-    if payload.provider.lower() == "momo":
-        return MoMoPaymentResponse(**result)
-    return VnPayPaymentResponse(**result)
+    return _INITIATE_RESPONSE_MODELS[payload.provider].model_validate(result)
 
 
 @router.post("/momo/webhook")
@@ -46,9 +50,9 @@ async def momo_webhook(
     request: Request,
     db: Database = Depends(get_database),
 ):
-    payload = await request.json()
-    result = service.handle_momo_webhook(db, payload)
-    return JSONResponse(content=result)
+    payload = orjson.loads(await request.body())
+    result = await run_in_threadpool(service.handle_momo_webhook, db, payload)
+    return ORJSONResponse(content=result)
 
 
 @router.get("/vnpay/webhook")
@@ -67,7 +71,7 @@ async def vnpay_webhook_post(
     db: Database = Depends(get_database),
 ):
     form = dict(await request.form())
-    response_text = service.handle_vnpay_webhook(db, form)
+    response_text = await run_in_threadpool(service.handle_vnpay_webhook, db, form)
     return PlainTextResponse(content=response_text)
 
 
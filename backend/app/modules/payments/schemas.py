@@ -6,7 +6,7 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Any, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class PaymentInitiateRequest(BaseModel):
@@ -14,6 +14,11 @@ class PaymentInitiateRequest(BaseModel):
     provider: str = Field(pattern="^(momo|vnpay)$")
     redirect_url: Optional[str] = None
 
+    @field_validator("provider", mode="before")
+    @classmethod
+    def normalise_provider(cls, value: Any) -> Any:
+        return value.lower() if isinstance(value, str) else value
+
 
 class MoMoPaymentResponse(BaseModel):
     payment_id: str
@@ -3,10 +3,11 @@
 
 from __future__ import annotations
 
-import hashlib
 import hmac
 import json
 from datetime import timedelta
+from functools import lru_cache
+from operator import itemgetter
 from typing import Any, Dict, Optional
 from uuid import uuid4
 from urllib.parse import quote_plus, urlencode
@@ -14,25 +15,77 @@ from urllib.parse import quote_plus, urlencode
 import httpx
 from bson import ObjectId
 from fastapi import HTTPException, status
+from pymongo import InsertOne, UpdateMany
 from pymongo.collection import Collection
 from pymongo.database import Database
+from starlette.concurrency import run_in_threadpool
 
 from ...config import get_settings
 from ...db.models import PaymentDocument
-from ..common.utils import utcnow
+from ..common.utils import is_object_id, utcnow
 from ..notifications import service as notifications_service
 from ..orders import service as orders_service
 
 
+_MOMO_IPN_FIELDS = (
+    "accessKey",
+    "amount",
+    "extraData",
+    "message",
+    "orderId",
+    "orderInfo",
+    "orderType",
+    "partnerCode",
+    "payType",
+    "requestId",
+    "responseTime",
+    "resultCode",
+    "transId",
+)
+_MOMO_IPN_TEMPLATE = "&".join(f"{key}={{{key}}}" for key in _MOMO_IPN_FIELDS)
+
+# Fields sent on every VNPay pay request, sorted once as the signature requires.
+_VNPAY_PAY_FIELDS = tuple(
+    sorted(
+        (
+            "vnp_Version",
+            "vnp_Command",
+            "vnp_TmnCode",
+            "vnp_Amount",
+            "vnp_CurrCode",
+            "vnp_TxnRef",
+            "vnp_OrderInfo",
+            "vnp_OrderType",
+            "vnp_Locale",
+            "vnp_ReturnUrl",
+            "vnp_IpAddr",
+            "vnp_CreateDate",
+            "vnp_ExpireDate",
+            "vnp_Bill_Email",
+            "vnp_Bill_FirstName",
+            "vnp_Bill_LastName",
+        )
+    )
+)
+_VNPAY_QUERY_FIELDS = tuple(sorted(_VNPAY_PAY_FIELDS + ("vnp_SecureHash",)))
+_VNPAY_UNSIGNED_FIELDS = frozenset(("vnp_SecureHash", "vnp_SecureHashType"))
+
+
+@lru_cache(maxsize=4)
 def payments_collection(db: Database) -> Collection:
     return db.get_collection("payments")
 
 
+def _sign(proto: hmac.HMAC, message: str) -> str:
+    mac = proto.copy()
+    mac.update(message.encode("utf-8"))
+    return mac.hexdigest()
+
+
 def _parse_object_id(value: str, label: str) -> ObjectId:
-    try:
-        return ObjectId(value)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{label} không hợp lệ") from exc
+    if not is_object_id(value):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{label} không hợp lệ")
+    return ObjectId(value)
 
 
 def _upsert_payment_record(
@@ -46,11 +99,6 @@ def _upsert_payment_record(
     payload: dict[str, Any],
 ) -> dict:
     now = utcnow()
-    payments_collection(db).update_many(
-        {"order_id": order["_id"], "provider": provider, "status": "pending"},
-        {"$set": {"status": "expired", "updated_at": now}},
-    )
-
     payment_doc: PaymentDocument = {
         "order_id": order["_id"],
         "order_code": order.get("order_code", ""),
@@ -65,18 +113,32 @@ def _upsert_payment_record(
         "created_at": now,
         "updated_at": now,
     }
-    result = payments_collection(db).insert_one(payment_doc)
-    payment_doc["_id"] = result.inserted_id  # type: ignore[index]
+    # Expire stale pending attempts and record the new one in a single round-trip;
+    # InsertOne fills in payment_doc["_id"].
+    payments_collection(db).bulk_write(
+        [
+            UpdateMany(
+                {"order_id": order["_id"], "provider": provider, "status": "pending"},
+                {"$set": {"status": "expired", "updated_at": now}},
+            ),
+            InsertOne(payment_doc),
+        ],
+        ordered=True,
+    )
     return payment_doc
 
 
-def initiate_momo_payment(
+async def initiate_momo_payment(
     db: Database,
     order: dict,
     redirect_url: Optional[str],
+    http_client: httpx.AsyncClient,
 ) -> dict:
     settings = get_settings()
-    if not all([settings.momo_partner_code, settings.momo_access_key, settings.momo_secret_key]):
+    partner_code = settings.momo_partner_code
+    access_key = settings.momo_access_key
+    endpoint = settings.momo_endpoint
+    if not all([partner_code, access_key, settings.momo_secret_key]):
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="MoMo chưa được cấu hình")
 
     request_id = uuid4().hex
@@ -89,25 +151,21 @@ def initiate_momo_payment(
     request_type = "captureWallet"
 
     raw_signature = (
-        f"accessKey={settings.momo_access_key}"
+        f"accessKey={access_key}"
         f"&amount={amount}"
         f"&extraData={extra_data}"
         f"&ipnUrl={ipn_url}"
         f"&orderId={order_id}"
         f"&orderInfo={order_info}"
-        f"&partnerCode={settings.momo_partner_code}"
+        f"&partnerCode={partner_code}"
         f"&redirectUrl={redirect}"
         f"&requestId={request_id}"
         f"&requestType={request_type}"
     )
-    signature = hmac.new(
-        settings.momo_secret_key.encode("utf-8"),
-        raw_signature.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
+    signature = _sign(settings.momo_hmac, raw_signature)
 
     payload = {
-        "partnerCode": settings.momo_partner_code,
+        "partnerCode": partner_code,
         "partnerName": "MoMo",
         "storeId": "PTUD2",
         "requestId": request_id,
@@ -127,8 +185,8 @@ def initiate_momo_payment(
     deeplink = None
     qr_code_url = None
     try:
-        if settings.momo_endpoint:
-            response = httpx.post(settings.momo_endpoint, json=payload, timeout=15.0)
+        if endpoint:
+            response = await http_client.post(endpoint, json=payload)
             if response.status_code == 200:
                 resp_json = response.json()
                 pay_url = resp_json.get("payUrl")
@@ -141,7 +199,8 @@ def initiate_momo_payment(
     except Exception as exc:  # noqa: BLE001
         payload["sdk_error"] = str(exc)
 
-    payment_doc = _upsert_payment_record(
+    payment_doc = await run_in_threadpool(
+        _upsert_payment_record,
         db=db,
         order=order,
         provider="momo",
@@ -154,7 +213,7 @@ def initiate_momo_payment(
 
     return {
         "payment_id": str(payment_doc["_id"]),
-        "partner_code": settings.momo_partner_code,
+        "partner_code": partner_code,
         "request_id": request_id,
         "order_id": order_id,
         "amount": amount,
@@ -165,10 +224,11 @@ def initiate_momo_payment(
     }
 
 
-def _create_vnpay_signature(data: Dict[str, Any], secret_key: str) -> str:
-    sorted_keys = sorted(data.keys())
-    sign_data = "&".join(f"{key}={data[key]}" for key in sorted_keys if data[key] is not None)
-    return hmac.new(secret_key.encode("utf-8"), sign_data.encode("utf-8"), hashlib.sha512).hexdigest()
+def _create_vnpay_signature(data: Dict[str, Any], proto: hmac.HMAC) -> str:
+    sign_data = "&".join(
+        f"{key}={data[key]}" for key in _VNPAY_PAY_FIELDS if data.get(key) is not None
+    )
+    return _sign(proto, sign_data)
 
 
 def initiate_vnpay_payment(
@@ -207,11 +267,9 @@ def initiate_vnpay_payment(
         "vnp_Bill_LastName": "",
     }
 
-    params = {k: v for k, v in params.items() if v is not None}
-    params["vnp_SecureHash"] = _create_vnpay_signature(params, settings.vnpay_hash_secret)
+    params["vnp_SecureHash"] = _create_vnpay_signature(params, settings.vnpay_hmac)
 
-    sorted_items = sorted(params.items())
-    query_string = "&".join(f"{k}={quote_plus(str(v))}" for k, v in sorted_items)
+    query_string = urlencode([(key, params[key]) for key in _VNPAY_QUERY_FIELDS], quote_via=quote_plus)
     pay_url = f"{settings.vnpay_base_url}?{query_string}"
 
     payment_doc = _upsert_payment_record(
@@ -233,25 +291,33 @@ def initiate_vnpay_payment(
     }
 
 
-def initiate_payment(
+def _get_payable_order(db: Database, user: dict, order_id_str: str) -> dict:
+    order_id = _parse_object_id(order_id_str, "order_id")
+    order = orders_service.get_order_by_object_id(db, order_id)
+    if order.get("buyer_id") != user["_id"] and (user.get("role") or "").lower() != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to pay for this order")
+    if order.get("payment_status") in {"paid", "cod_collected"}:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Đơn hàng đã thanh toán")
+    return order
+
+
+async def initiate_payment(
     db: Database,
     user: dict,
     order_id_str: str,
     provider: str,
     redirect_url: Optional[str],
+    http_client: httpx.AsyncClient,
     client_ip: str = "127.0.0.1",
 ) -> dict:
-    order_id = _parse_object_id(order_id_str, "order_id")
-    order = orders_service.get_order_by_object_id(db, order_id)
-    if order.get("buyer_id") != user["_id"] and (user.get("role") or "").lower() != "admin":
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to pay for this order")
-    if order.get("payment_status") in {"paid", "cod_collected"}:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Đơn hàng đã thanh toán")
+    # pymongo is blocking: only the MoMo HTTP call is awaited on the event loop,
+    # everything touching the database runs in the threadpool.
+    order = await run_in_threadpool(_get_payable_order, db, user, order_id_str)
 
     if provider == "momo":
-        return initiate_momo_payment(db, order, redirect_url)
+        return await initiate_momo_payment(db, order, redirect_url, http_client)
     if provider == "vnpay":
-        return initiate_vnpay_payment(db, order, redirect_url, client_ip)
+        return await run_in_threadpool(initiate_vnpay_payment, db, order, redirect_url, client_ip)
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provider is not supported")
 
 
@@ -275,6 +341,32 @@ def _update_payment_record_status(
     )
 
 
+def _find_payment_with_order(db: Database, match: dict[str, Any]) -> tuple[dict, dict]:
+    """Fetch a payment record together with its order in a single round-trip."""
+    cursor = payments_collection(db).aggregate(
+        [
+            {"$match": match},
+            {"$limit": 1},
+            {
+                "$lookup": {
+                    "from": "orders",
+                    "localField": "order_id",
+                    "foreignField": "_id",
+                    "as": "order",
+                }
+            },
+        ],
+        hint="payment_webhook_lookup",
+    )
+    payment_doc = next(cursor, None)
+    if not payment_doc:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment record not found")
+    orders = payment_doc.pop("order")
+    if not orders:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy đơn hàng")
+    return payment_doc, orders[0]
+
+
 def handle_momo_webhook(db: Database, payload: dict[str, Any]) -> dict:
     settings = get_settings()
     if not settings.momo_secret_key:
@@ -284,45 +376,29 @@ def handle_momo_webhook(db: Database, payload: dict[str, Any]) -> dict:
     if not required_fields.issubset(set(payload.keys())):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing MoMo parameters")
 
+    # Reject malformed signatures before spending an HMAC on them.
+    received_signature = payload["signature"]
+    if not isinstance(received_signature, str) or len(received_signature) != 64:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid MoMo signature")
+
     access_key = settings.momo_access_key or ""
-    raw_signature = "&".join(
-        f"{key}={payload.get(key, '')}"
-        for key in [
-            "accessKey",
-            "amount",
-            "extraData",
-            "message",
-            "orderId",
-            "orderInfo",
-            "orderType",
-            "partnerCode",
-            "payType",
-            "requestId",
-            "responseTime",
-            "resultCode",
-            "transId",
-        ]
-    ).replace("accessKey=", f"accessKey={access_key}")
-
-    generated_signature = hmac.new(
-        (settings.momo_ipn_secret or settings.momo_secret_key).encode("utf-8"),
-        raw_signature.encode("utf-8"),
-        hashlib.sha256,
-    ).hexdigest()
-    if generated_signature != payload.get("signature"):
+    fields = dict.fromkeys(_MOMO_IPN_FIELDS, "")
+    fields.update(payload)
+    fields["accessKey"] = access_key
+    raw_signature = _MOMO_IPN_TEMPLATE.format_map(fields)
+
+    generated_signature = _sign(settings.momo_ipn_hmac, raw_signature)
+    if not hmac.compare_digest(generated_signature.encode("utf-8"), received_signature.encode("utf-8")):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid MoMo signature")
 
-    payment_doc = payments_collection(db).find_one(
+    payment_doc, order = _find_payment_with_order(
+        db,
         {
             "order_code": payload.get("orderId"),
             "provider": "momo",
             "request_id": payload.get("requestId"),
-        }
+        },
     )
-    if not payment_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment record not found")
-
-    order = orders_service.get_order_by_object_id(db, payment_doc["order_id"])
     amount = float(payload.get("amount", 0))
     if abs(amount - float(order.get("total_amount", 0))) > 1:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Amount mismatch")
@@ -337,24 +413,27 @@ def handle_momo_webhook(db: Database, payload: dict[str, Any]) -> dict:
             actor_id=None,
             transaction_id=payload.get("transId"),
         )
-        notifications_service.create_notification(
-            db,
-            order["buyer_id"],
-            notification_type="payment_paid",
-            title="Payment successful",
-            message=f"Order {order.get('order_code', '')} has been paid via MoMo.",
-            metadata={"order_id": str(order["_id"]), "provider": "momo"},
-        )
+        specs: list[notifications_service.NotificationSpec] = [
+            {
+                "user_id": order["buyer_id"],
+                "notification_type": "payment_paid",
+                "title": "Payment successful",
+                "message": f"Order {order.get('order_code', '')} has been paid via MoMo.",
+                "metadata": {"order_id": str(order["_id"]), "provider": "momo"},
+            }
+        ]
         seller_id = order.get("seller_id")
         if seller_id:
-            notifications_service.create_notification(
-                db,
-                seller_id,
-                notification_type="payment_paid",
-                title="Order paid",
-                message=f"Order {order.get('order_code', '')} has been paid by the buyer.",
-                metadata={"order_id": str(order["_id"]), "provider": "momo"},
+            specs.append(
+                {
+                    "user_id": seller_id,
+                    "notification_type": "payment_paid",
+                    "title": "Order paid",
+                    "message": f"Order {order.get('order_code', '')} has been paid by the buyer.",
+                    "metadata": {"order_id": str(order["_id"]), "provider": "momo"},
+                }
             )
+        notifications_service.create_notifications_bulk(db, specs)
     else:
         _update_payment_record_status(db, payment_doc, "failed", payload.get("transId"), payload)
         orders_service.update_order_payment_status(
@@ -374,13 +453,15 @@ def handle_momo_webhook(db: Database, payload: dict[str, Any]) -> dict:
         )
 
     return {"resultCode": 0, "message": "success"}
-def _verify_vnpay_signature(params: dict[str, str], secret_key: str) -> bool:
-    received_hash = params.pop("vnp_SecureHash", None)
-    params.pop("vnp_SecureHashType", None)
-    sorted_params = sorted(params.items())
-    sign_data = "&".join(f"{key}={value}" for key, value in sorted_params)
-    calculated_hash = hmac.new(secret_key.encode("utf-8"), sign_data.encode("utf-8"), hashlib.sha512).hexdigest()
-    return calculated_hash.lower() == (received_hash or "").lower()
+def _verify_vnpay_signature(params: dict[str, str], proto: hmac.HMAC) -> bool:
+    received_hash = params.get("vnp_SecureHash") or ""
+    if len(received_hash) != 128:
+        return False
+    items = [(key, value) for key, value in params.items() if key not in _VNPAY_UNSIGNED_FIELDS]
+    items.sort(key=itemgetter(0))
+    sign_data = "&".join(f"{key}={value}" for key, value in items)
+    calculated_hash = _sign(proto, sign_data)
+    return hmac.compare_digest(calculated_hash.encode("utf-8"), received_hash.lower().encode("utf-8"))
 
 
 def handle_vnpay_webhook(db: Database, query_params: dict[str, str]) -> str:
@@ -388,8 +469,8 @@ def handle_vnpay_webhook(db: Database, query_params: dict[str, str]) -> str:
     if not settings.vnpay_hash_secret:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="VNPay is not configured")
 
-    params = dict(query_params)
-    if not _verify_vnpay_signature(params.copy(), settings.vnpay_hash_secret):
+    params = query_params
+    if not _verify_vnpay_signature(params, settings.vnpay_hmac):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid VNPay signature")
 
     order_code = params.get("vnp_OrderInfo", "").split()[-1] if params.get("vnp_OrderInfo") else None
@@ -397,13 +478,9 @@ def handle_vnpay_webhook(db: Database, query_params: dict[str, str]) -> str:
     amount = float(params.get("vnp_Amount", "0")) / 100
     response_code = params.get("vnp_ResponseCode")
 
-    payment_doc = payments_collection(db).find_one(
-        {"order_code": order_code, "provider": "vnpay", "request_id": txn_ref}
+    payment_doc, order = _find_payment_with_order(
+        db, {"order_code": order_code, "provider": "vnpay", "request_id": txn_ref}
     )
-    if not payment_doc:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Payment record not found")
-
-    order = orders_service.get_order_by_object_id(db, payment_doc["order_id"])
     if abs(amount - float(order.get("total_amount", 0))) > 1:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Amount mismatch")
 
@@ -417,24 +494,27 @@ def handle_vnpay_webhook(db: Database, query_params: dict[str, str]) -> str:
             actor_id=None,
             transaction_id=params.get("vnp_TransactionNo"),
         )
-        notifications_service.create_notification(
-            db,
-            order["buyer_id"],
-            notification_type="payment_paid",
-            title="Payment successful",
-            message=f"Order {order.get('order_code', '')} has been paid via VNPay.",
-            metadata={"order_id": str(order["_id"]), "provider": "vnpay"},
-        )
+        specs: list[notifications_service.NotificationSpec] = [
+            {
+                "user_id": order["buyer_id"],
+                "notification_type": "payment_paid",
+                "title": "Payment successful",
+                "message": f"Order {order.get('order_code', '')} has been paid via VNPay.",
+                "metadata": {"order_id": str(order["_id"]), "provider": "vnpay"},
+            }
+        ]
         seller_id = order.get("seller_id")
         if seller_id:
-            notifications_service.create_notification(
-                db,
-                seller_id,
-                notification_type="payment_paid",
-                title="Order paid",
-                message=f"Order {order.get('order_code', '')} has been paid by the buyer.",
-                metadata={"order_id": str(order["_id"]), "provider": "vnpay"},
+            specs.append(
+                {
+                    "user_id": seller_id,
+                    "notification_type": "payment_paid",
+                    "title": "Order paid",
+                    "message": f"Order {order.get('order_code', '')} has been paid by the buyer.",
+                    "metadata": {"order_id": str(order["_id"]), "provider": "vnpay"},
+                }
             )
+        notifications_service.create_notifications_bulk(db, specs)
         return "00"
 
     _update_payment_record_status(db, payment_doc, "failed", params.get("vnp_TransactionNo"), params)
@@ -9,9 +9,11 @@ from pymongo.database import Database
 
 from ...db.models import UserDocument
 from ...db.session import get_database
+from ..common.responses import ORJSONArrayStreamingResponse
+from ..common.types import PathObjectId
 from ..common.utils import utcnow
 from ..catalog import service as catalog_service
-from ..catalog.schemas import ProductListResponse, ProductResponse
+from ..catalog.schemas import ProductListResponse, ProductMedia, ProductResponse, ProductVariant
 from ..users.dependencies import get_current_user, require_admin, require_seller
 from . import service
 from .schemas import (
@@ -26,10 +28,10 @@ router = APIRouter(prefix="/sellers", tags=["sellers"])
 admin_router = APIRouter(prefix="/admin/sellers", tags=["admin-sellers"], dependencies=[Depends(require_admin)])
 
 
-def _seller_to_response(doc: dict) -> SellerResponse:
-    payload = {
-        "_id": doc["_id"],
-        "user_id": doc["user_id"],
+def _seller_payload(doc: dict) -> dict:
+    return {
+        "_id": str(doc["_id"]),
+        "user_id": str(doc["user_id"]),
         "shop_name": doc.get("shop_name", ""),
         "slug": doc.get("slug", ""),
         "description": doc.get("description"),
@@ -42,7 +44,19 @@ def _seller_to_response(doc: dict) -> SellerResponse:
         "created_at": doc.get("created_at") or utcnow(),
         "updated_at": doc.get("updated_at") or utcnow(),
     }
-    return SellerResponse.model_validate(payload)
+
+
+def _seller_json(doc: dict) -> dict:
+    # Naive ISO timestamps, as the pydantic-serialised seller endpoints render them.
+    payload = _seller_payload(doc)
+    payload["created_at"] = payload["created_at"].isoformat()
+    payload["updated_at"] = payload["updated_at"].isoformat()
+    return payload
+
+
+def _seller_to_response(doc: dict) -> SellerResponse:
+    # Stored sellers are trusted, so the response is assembled without re-validation.
+    return SellerResponse.model_construct(**_seller_payload(doc))
 
 
 @router.post("/apply", response_model=SellerResponse, status_code=status.HTTP_201_CREATED)
@@ -83,15 +97,16 @@ def seller_dashboard_summary(
 
 
 def _product_to_response(doc: dict) -> ProductResponse:
+    # Stored products are trusted, so the response is assembled without re-validation.
     variants_payload = []
     for variant in doc.get("variants", []):
         item = dict(variant)
         if item.get("_id") is not None:
             item["_id"] = str(item["_id"])
-        variants_payload.append(item)
+        variants_payload.append(ProductVariant.model_construct(**item))
 
-    return ProductResponse.model_validate(
-        {
+    return ProductResponse.model_construct(
+        **{
             "_id": str(doc["_id"]),
             "seller_id": str(doc["seller_id"]),
             "name": doc.get("name", ""),
@@ -109,7 +124,7 @@ def _product_to_response(doc: dict) -> ProductResponse:
             "variants": variants_payload,
             "thumbnail_url": doc.get("thumbnail_url"),
             "image_urls": doc.get("image_urls", []),
-            "media": doc.get("media", []),
+            "media": [ProductMedia.model_construct(**media) for media in doc.get("media", [])],
             "slug": doc.get("slug"),
             "created_at": doc.get("created_at"),
             "updated_at": doc.get("updated_at"),
@@ -143,30 +158,32 @@ def list_my_products(
     )
 
 
-@admin_router.get("", response_model=list[SellerResponse])
+@admin_router.get(
+    "",
+    response_model=None,
+    responses={200: {"model": list[SellerResponse]}},
+)
 def admin_list_sellers(
     status_filter: str | None = Query(default=None, alias="status"),
+    limit: int = Query(default=100, ge=1, le=500),
+    skip: int = Query(default=0, ge=0),
     db: Database = Depends(get_database),
-) -> list[SellerResponse]:
-    sellers = service.admin_list_sellers(db, status_filter)
-    return [_seller_to_response(doc) for doc in sellers]
+) -> ORJSONArrayStreamingResponse:
+    # Documents are encoded as the cursor yields them, so the page is never held in memory.
+    sellers = service.admin_list_sellers(db, status_filter, limit=limit, skip=skip)
+    return ORJSONArrayStreamingResponse(_seller_json(doc) for doc in sellers)
 
 
 @admin_router.put("/{seller_id}/status", response_model=SellerResponse)
 def admin_update_seller_status(
-    seller_id: str,
+    seller_id: PathObjectId,
     payload: AdminSellerUpdateRequest,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
 ) -> SellerResponse:
-    try:
-        seller_oid = ObjectId(seller_id)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID không hợp lệ") from exc
-
     seller_doc = service.admin_update_seller_status(
         db,
-        seller_oid,
+        seller_id,
         payload.status,
         payload.verification_notes,
         current_user,
@@ -4,39 +4,54 @@
 from __future__ import annotations
 
 import re
-from datetime import datetime, timezone
+from functools import lru_cache
 from typing import Optional
 
 from bson import ObjectId
 from fastapi import HTTPException, status
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
+from pymongo.cursor import Cursor
 from pymongo.database import Database
 
-from ...db.models import OrderDocument, SellerDocument
+from ...db.models import SellerDocument
 from ..common.utils import utcnow
-from ..users.dependencies import users_collection
+from ..users.dependencies import invalidate_cached_user, users_collection
 
 
+@lru_cache(maxsize=4)
 def sellers_collection(db: Database) -> Collection:
     return db.get_collection("sellers")
 
 
 SLUG_REGEX = re.compile(r"[^a-z0-9]+")
-
-
-def _generate_slug(base: str, db: Database, exclude_id: Optional[ObjectId] = None) -> str:
-    slug = SLUG_REGEX.sub("-", base.lower()).strip("-")
-    slug = slug or "shop"
+# Byte table mapping every non [a-z0-9] ASCII byte to "-" for the translate fast path.
+_SLUG_TABLE = bytes(c if chr(c) in "abcdefghijklmnopqrstuvwxyz0123456789" else ord("-") for c in range(256))
+PAID_STATUSES = ["paid", "cod_collected"]
+
+
+def _slugify(base: str) -> str:
+    lowered = base.lower()
+    try:
+        dashed = lowered.encode("ascii").translate(_SLUG_TABLE).decode("ascii")
+    except UnicodeEncodeError:
+        return SLUG_REGEX.sub("-", lowered).strip("-")
+    return "-".join(part for part in dashed.split("-") if part)
+
+
+def _generate_slug(base: str, db: Database, exclude_user_id: Optional[ObjectId] = None) -> str:
+    slug = _slugify(base) or "shop"
+    # Fetch every taken "slug" / "slug-N" in one anchored (index-backed) query.
+    query: dict = {"slug": {"$regex": f"^{re.escape(slug)}(-\\d+)?$"}}
+    if exclude_user_id:
+        query["user_id"] = {"$ne": exclude_user_id}
+    taken = {doc["slug"] for doc in sellers_collection(db).find(query, {"slug": 1, "_id": 0})}
     candidate = slug
     index = 1
-    while True:
-        query: dict = {"slug": candidate}
-        if exclude_id:
-            query["_id"] = {"$ne": exclude_id}
-        if not sellers_collection(db).find_one(query):
-            return candidate
+    while candidate in taken:
         index += 1
         candidate = f"{slug}-{index}"
+    return candidate
 
 
 def _serialize_seller(doc: SellerDocument) -> dict:
@@ -54,11 +69,8 @@ def submit_application(
     payload: dict,
 ) -> dict:
     now = utcnow()
-    coll = sellers_collection(db)
-    existing = coll.find_one({"user_id": user["_id"]})
-
     shop_name = payload["shop_name"].strip()
-    slug = _generate_slug(shop_name, db, exclude_id=existing["_id"] if existing else None)
+    slug = _generate_slug(shop_name, db, exclude_user_id=user["_id"])
 
     update_fields: SellerDocument = {
         "user_id": user["_id"],
@@ -72,19 +84,29 @@ def submit_application(
         "updated_at": now,
     }
 
-    if existing:
-        status_value = existing.get("status", "pending")
-        if status_value in {"rejected", "pending"}:
-            update_fields["status"] = "pending"
-            update_fields["verification_notes"] = None
-        coll.update_one({"_id": existing["_id"]}, {"$set": update_fields})
-        seller = coll.find_one({"_id": existing["_id"]})
-    else:
-        update_fields["status"] = "pending"
-        update_fields["verification_notes"] = None
-        update_fields["created_at"] = now
-        result = coll.insert_one(update_fields)
-        seller = coll.find_one({"_id": result.inserted_id})
+    # New, pending and rejected applications go (back) to review; approved or
+    # suspended shops keep their status. One upserting pipeline update covers
+    # every case and returns the stored document.
+    needs_review = {"$in": [{"$ifNull": ["$status", "pending"]}, ["pending", "rejected"]]}
+    seller = sellers_collection(db).find_one_and_update(
+        {"user_id": user["_id"]},
+        [
+            {
+                "$set": {
+                    **{key: {"$literal": value} for key, value in update_fields.items()},
+                    "created_at": {"$ifNull": ["$created_at", now]},
+                }
+            },
+            {
+                "$set": {
+                    "status": {"$cond": [needs_review, "pending", "$status"]},
+                    "verification_notes": {"$cond": [needs_review, None, "$verification_notes"]},
+                }
+            },
+        ],
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
 
     if not seller:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Không tạo được hồ sơ người bán")
@@ -105,12 +127,42 @@ def get_seller_by_id(db: Database, seller_id: ObjectId) -> dict:
     return _serialize_seller(seller)
 
 
-def admin_list_sellers(db: Database, status_filter: Optional[str] = None) -> list[dict]:
+# Exactly the SellerResponse fields; anything else stored on the document stays out.
+ADMIN_LIST_PROJECTION = {
+    field: 1
+    for field in (
+        "user_id",
+        "shop_name",
+        "slug",
+        "description",
+        "logo_url",
+        "cover_image_url",
+        "status",
+        "verification_notes",
+        "social_links",
+        "documents",
+        "created_at",
+        "updated_at",
+    )
+}
+
+
+def admin_list_sellers(
+    db: Database,
+    status_filter: Optional[str] = None,
+    limit: int = 100,
+    skip: int = 0,
+) -> Cursor:
     query: dict = {}
     if status_filter:
         query["status"] = status_filter
-    sellers = sellers_collection(db).find(query).sort("created_at", -1)
-    return [_serialize_seller(doc) for doc in sellers]
+    return (
+        sellers_collection(db)
+        .find(query, ADMIN_LIST_PROJECTION)
+        .sort("created_at", -1)
+        .skip(skip)
+        .limit(limit)
+    )
 
 
 def admin_update_seller_status(
@@ -120,20 +172,19 @@ def admin_update_seller_status(
     verification_notes: Optional[str],
     admin_user: dict,
 ) -> dict:
-    seller = sellers_collection(db).find_one({"_id": seller_id})
-    if not seller:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy người bán")
-
+    now = utcnow()
     update = {
         "status": status_value,
         "verification_notes": verification_notes,
-        "updated_at": utcnow(),
+        "updated_at": now,
     }
-    sellers_collection(db).update_one({"_id": seller_id}, {"$set": update})
-
-    seller = sellers_collection(db).find_one({"_id": seller_id})
+    seller = sellers_collection(db).find_one_and_update(
+        {"_id": seller_id},
+        {"$set": update},
+        return_document=ReturnDocument.AFTER,
+    )
     if not seller:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Không cập nhật được người bán")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Không tìm thấy người bán")
 
     if status_value == "approved":
         users_collection(db).update_one(
@@ -142,62 +193,80 @@ def admin_update_seller_status(
                 "$set": {
                     "role": "seller",
                     "is_active": True,
-                    "updated_at": utcnow(),
+                    "updated_at": now,
                 }
             },
         )
+        invalidate_cached_user(seller["user_id"])
     return _serialize_seller(seller)
 
 
-def _calculate_revenue(orders: list[OrderDocument]) -> tuple[float, float]:
-    total_revenue = 0.0
-    revenue_this_month = 0.0
-    now = utcnow()
-    month_start = datetime(year=now.year, month=now.month, day=1, tzinfo=timezone.utc)
-
-    for order in orders:
-        total_amount = float(order.get("total_amount", 0))
-        if order.get("payment_status") in {"paid", "cod_collected"}:
-            total_revenue += total_amount
-            created_at = order.get("created_at") or now
-            if created_at >= month_start:
-                revenue_this_month += total_amount
-    return round(total_revenue, 2), round(revenue_this_month, 2)
-
-
 def get_dashboard_summary(
     db: Database,
     seller: dict,
 ) -> dict:
     seller_id = ObjectId(seller["_id"])
-    orders = list(db.get_collection("orders").find({"seller_id": seller_id}))
-
-    total_orders = len(orders)
-    pending_orders = sum(1 for order in orders if order.get("fulfillment_status") == "pending_confirmation")
-    processing_orders = sum(
-        1 for order in orders if order.get("fulfillment_status") in {"processing", "shipping"}
-    )
-    cancelled_orders = sum(1 for order in orders if order.get("fulfillment_status") == "cancelled")
-    completed_orders = sum(1 for order in orders if order.get("fulfillment_status") in {"delivered", "completed"})
-
-    orders_today = 0
     now = utcnow()
-    today_start = datetime(year=now.year, month=now.month, day=now.day, tzinfo=timezone.utc)
-    for order in orders:
-        created_at = order.get("created_at") or now
-        if created_at >= today_start:
-            orders_today += 1
-
-    total_revenue, revenue_this_month = _calculate_revenue(orders)
-
-    low_stock_items = 0
-    product_cursor = db.get_collection("products").find({"seller_id": seller_id})
-    for product in product_cursor:
-        for variant in product.get("variants", []):
-            stock_quantity = int(variant.get("stock_quantity", 0))
-            threshold = int(variant.get("low_stock_threshold", 5))
-            if stock_quantity <= threshold:
-                low_stock_items += 1
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    month_start = today_start.replace(day=1)
+    created_at = {"$ifNull": ["$created_at", now]}
+
+    # One round-trip: the server reduces the seller's orders to a handful of counters.
+    pipeline = [
+        {"$match": {"seller_id": seller_id}},
+        {
+            "$facet": {
+                "status_counts": [{"$group": {"_id": "$fulfillment_status", "count": {"$sum": 1}}}],
+                "revenue": [
+                    {"$match": {"payment_status": {"$in": PAID_STATUSES}}},
+                    {
+                        "$group": {
+                            "_id": {"$gte": [created_at, month_start]},
+                            "total": {"$sum": {"$ifNull": ["$total_amount", 0]}},
+                        }
+                    },
+                ],
+                "today": [
+                    {"$match": {"$expr": {"$gte": [created_at, today_start]}}},
+                    {"$count": "count"},
+                ],
+            }
+        },
+    ]
+    facets = next(db.get_collection("orders").aggregate(pipeline), {})
+
+    status_counts = {row["_id"]: row["count"] for row in facets.get("status_counts", [])}
+    total_orders = sum(status_counts.values())
+    pending_orders = status_counts.get("pending_confirmation", 0)
+    processing_orders = status_counts.get("processing", 0) + status_counts.get("shipping", 0)
+    cancelled_orders = status_counts.get("cancelled", 0)
+    completed_orders = status_counts.get("delivered", 0) + status_counts.get("completed", 0)
+
+    revenue = {row["_id"]: float(row["total"]) for row in facets.get("revenue", [])}
+    revenue_this_month = round(revenue.get(True, 0.0), 2)
+    total_revenue = round(revenue.get(True, 0.0) + revenue.get(False, 0.0), 2)
+
+    today = facets.get("today") or [{"count": 0}]
+    orders_today = today[0]["count"]
+
+    low_stock_pipeline = [
+        {"$match": {"seller_id": seller_id}},
+        {"$project": {"_id": 0, "variants.stock_quantity": 1, "variants.low_stock_threshold": 1}},
+        {"$unwind": "$variants"},
+        {
+            "$match": {
+                "$expr": {
+                    "$lte": [
+                        {"$ifNull": ["$variants.stock_quantity", 0]},
+                        {"$ifNull": ["$variants.low_stock_threshold", 5]},
+                    ]
+                }
+            }
+        },
+        {"$count": "count"},
+    ]
+    low_stock = next(db.get_collection("products").aggregate(low_stock_pipeline), None)
+    low_stock_items = low_stock["count"] if low_stock else 0
 
     summary = {
         "total_orders": total_orders,
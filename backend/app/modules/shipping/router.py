@@ -2,12 +2,15 @@
 
 from __future__ import annotations
 
-from bson import ObjectId
+from typing import Annotated
+
 from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pymongo.database import Database
+from starlette.concurrency import run_in_threadpool
 
 from ...db.models import UserDocument
 from ...db.session import get_database
+from ..common.types import PathObjectId, object_id_detail
 from ..orders import service as orders_service
 from ..users.dependencies import get_current_user, require_admin, require_seller
 from . import service as shipping_service
@@ -25,12 +28,7 @@ admin_router = APIRouter(
     dependencies=[Depends(require_admin)],
 )
 
-
-def _parse_object_id(value: str, label: str) -> ObjectId:
-    try:
-        return ObjectId(value)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"{label} is invalid") from exc
+OrderId = Annotated[PathObjectId, object_id_detail("order_id is invalid")]
 
 
 def _shipment_to_response(doc: dict) -> ShippingResponse:
@@ -51,13 +49,12 @@ def _shipment_to_response(doc: dict) -> ShippingResponse:
 
 @router.post("/orders/{order_id}", response_model=ShippingResponse, status_code=status.HTTP_201_CREATED)
 def create_shipment(
-    order_id: str,
+    order_id: OrderId,
     payload: ShippingCreateRequest,
     current_user: UserDocument = Depends(require_seller),
     db: Database = Depends(get_database),
 ) -> ShippingResponse:
-    order_oid = _parse_object_id(order_id, "order_id")
-    order = orders_service.get_order_by_object_id(db, order_oid)
+    order = orders_service.get_order_by_object_id(db, order_id)
     if order.get("seller_id") != current_user["_id"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to create shipment for this order")
 
@@ -75,19 +72,18 @@ def create_shipment(
 
 @router.get("/orders/{order_id}", response_model=ShippingResponse)
 def get_shipment_for_order(
-    order_id: str,
+    order_id: OrderId,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
 ) -> ShippingResponse:
-    order_oid = _parse_object_id(order_id, "order_id")
-    order = orders_service.get_order_by_object_id(db, order_oid)
+    order = orders_service.get_order_by_object_id(db, order_id)
     role = (current_user.get("role") or "buyer").lower()
     if role == "buyer" and order.get("buyer_id") != current_user["_id"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
     if role == "seller" and order.get("seller_id") != current_user["_id"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized")
 
-    shipment = shipping_service.get_shipment_by_order(db, order_oid)
+    shipment = shipping_service.get_shipment_by_order(db, order_id)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found for order")
     return _shipment_to_response(shipment)
@@ -95,17 +91,16 @@ def get_shipment_for_order(
 
 @router.patch("/orders/{order_id}", response_model=ShippingResponse)
 def update_shipment_status_manual(
-    order_id: str,
+    order_id: OrderId,
     payload: ShippingStatusUpdateRequest,
     current_user: UserDocument = Depends(require_seller),
     db: Database = Depends(get_database),
 ) -> ShippingResponse:
-    order_oid = _parse_object_id(order_id, "order_id")
-    order = orders_service.get_order_by_object_id(db, order_oid)
+    order = orders_service.get_order_by_object_id(db, order_id)
     if order.get("seller_id") != current_user["_id"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed to update this order")
 
-    shipment = shipping_service.get_shipment_by_order(db, order_oid)
+    shipment = shipping_service.get_shipment_by_order(db, order_id)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found for order")
 
@@ -135,14 +130,14 @@ async def shipping_webhook(
         estimated_delivery=raw_payload.get("estimated_delivery"),
         raw_payload=raw_payload,
     ).model_dump()
-    updated = shipping_service.handle_webhook_update(db, provider, webhook_payload)
+    # The service is blocking PyMongo; run it off the event loop so webhooks don't stall other requests.
+    updated = await run_in_threadpool(shipping_service.handle_webhook_update, db, provider, webhook_payload)
     return _shipment_to_response(updated)
 
 
 @admin_router.get("/orders/{order_id}", response_model=ShippingResponse)
-def admin_get_shipment(order_id: str, db: Database = Depends(get_database)) -> ShippingResponse:
-    order_oid = _parse_object_id(order_id, "order_id")
-    shipment = shipping_service.get_shipment_by_order(db, order_oid)
+def admin_get_shipment(order_id: OrderId, db: Database = Depends(get_database)) -> ShippingResponse:
+    shipment = shipping_service.get_shipment_by_order(db, order_id)
     if not shipment:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found for order")
     return _shipment_to_response(shipment)
\ No newline at end of file
@@ -3,11 +3,13 @@
 from __future__ import annotations
 
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 from uuid import uuid4
 
 from bson import ObjectId
 from fastapi import HTTPException, status
+from pymongo import ReturnDocument
 from pymongo.collection import Collection
 from pymongo.database import Database
 
@@ -19,6 +21,7 @@ from ..orders import service as orders_service
 ALLOWED_CREATE_STATUSES = {"pending_confirmation", "processing"}
 
 
+@lru_cache(maxsize=4)
 def shipments_collection(db: Database) -> Collection:
     return db.get_collection("shipments")
 
@@ -35,7 +38,8 @@ def create_shipment(
     if order.get("fulfillment_status") not in ALLOWED_CREATE_STATUSES:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Order cannot create shipment in the current status")
 
-    existing = shipments_collection(db).find_one({"order_id": order["_id"]})
+    coll = shipments_collection(db)
+    existing = coll.find_one({"order_id": order["_id"]})
     if existing:
         return existing
 
@@ -62,7 +66,7 @@ def create_shipment(
             "weight_grams": weight_grams,
         },
     }
-    result = shipments_collection(db).insert_one(shipment)
+    result = coll.insert_one(shipment)
     shipment["_id"] = result.inserted_id  # type: ignore[index]
 
     orders_service.update_order_fulfillment_status(
@@ -110,10 +114,6 @@ def update_shipment_status(
     estimated_delivery=None,
     raw_payload: Optional[dict] = None,
 ) -> ShipmentDocument:
-    shipment = shipments_collection(db).find_one({"tracking_number": tracking_number})
-    if not shipment:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
-
     now = utcnow()
     history_entry = {
         "status": status_value,
@@ -137,14 +137,14 @@ def update_shipment_status(
         update_doc["$set"]["payload"] = raw_payload
 
     updated = shipments_collection(db).find_one_and_update(
-        {"_id": shipment["_id"]},
+        {"tracking_number": tracking_number},
         update_doc,
-        return_document=True,
+        return_document=ReturnDocument.AFTER,
     )
     if not updated:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update shipment")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Shipment not found")
 
-    order_id = shipment["order_id"]
+    order_id = updated["order_id"]
 
     status_mapping = {
         "in_transit": "shipping",
@@ -155,15 +155,16 @@ def update_shipment_status(
     }
     order_status = status_mapping.get(status_value)
     if order_status:
-        orders_service.update_order_fulfillment_status(
+        # The fulfillment update already returns the fresh order; only re-read when it is skipped.
+        order_doc = orders_service.update_order_fulfillment_status(
             db,
             order_id,
             new_status=order_status,
             note=note or f"Shipment status: {status_value}",
             actor_id=None,
         )
-
-    order_doc = orders_service.get_order_by_object_id(db, order_id)
+    else:
+        order_doc = orders_service.get_order_by_object_id(db, order_id)
     titles = {
         "in_transit": ("Shipment in transit", "Shipment is on the way."),
         "shipping": ("Shipment in transit", "Shipment is on the way."),
@@ -173,32 +174,32 @@ def update_shipment_status(
         "returned": ("Shipment returned", "Shipment has been returned."),
     }
     title, default_message = titles.get(status_value, ("Shipment update", "Shipment status has changed."))
-    notifications_service.create_notification(
-        db,
-        order_doc["buyer_id"],
-        notification_type="shipment_update",
-        title=title,
-        message=note or default_message,
-        metadata={
-            "order_id": str(order_doc["_id"]),
-            "tracking_number": tracking_number,
-            "status": status_value,
-        },
-    )
+    metadata = {
+        "order_id": str(order_doc["_id"]),
+        "tracking_number": tracking_number,
+        "status": status_value,
+    }
+    specs: list[notifications_service.NotificationSpec] = [
+        {
+            "user_id": order_doc["buyer_id"],
+            "notification_type": "shipment_update",
+            "title": title,
+            "message": note or default_message,
+            "metadata": metadata,
+        }
+    ]
     seller_id = order_doc.get("seller_id")
     if seller_id and status_value in {"cancelled", "returned"}:
-        notifications_service.create_notification(
-            db,
-            seller_id,
-            notification_type="shipment_update",
-            title=title,
-            message=note or default_message,
-            metadata={
-                "order_id": str(order_doc["_id"]),
-                "tracking_number": tracking_number,
-                "status": status_value,
-            },
+        specs.append(
+            {
+                "user_id": seller_id,
+                "notification_type": "shipment_update",
+                "title": title,
+                "message": note or default_message,
+                "metadata": metadata,
+            }
         )
+    notifications_service.create_notifications_bulk(db, specs)
 
     return updated  # type: ignore[return-value]
 
@@ -3,9 +3,13 @@
 
 from __future__ import annotations
 
+from hashlib import blake2b
+from threading import Lock
 from typing import Iterable, Optional
 
-from fastapi import Depends, HTTPException, status
+from bson import ObjectId
+from cachetools import TTLCache
+from fastapi import Depends, HTTPException, Request, status
 from pymongo.collection import Collection
 from pymongo.database import Database
 
@@ -17,6 +21,22 @@ from ..common.utils import is_email, is_phone_number, normalize_email
 
 settings = get_settings()
 
+# Fields read by authentication, role checks and the profile/user payloads.
+USER_AUTH_PROJECTION = {
+    "email": 1,
+    "phone_number": 1,
+    "hashed_password": 1,
+    "role": 1,
+    "is_active": 1,
+    "created_at": 1,
+    "updated_at": 1,
+}
+
+# Resolved bearer token -> user document, kept briefly so hot clients skip the
+# Mongo lookup; role/status changes invalidate explicitly.
+_USER_CACHE: TTLCache = TTLCache(maxsize=10_000, ttl=30)
+_USER_CACHE_LOCK = Lock()
+
 
 def users_collection(db: Database) -> Collection:
     return db.get_collection("users")
@@ -25,12 +45,32 @@ def users_collection(db: Database) -> Collection:
 def find_user_by_identifier(db: Database, identifier: str) -> Optional[UserDocument]:
     users = users_collection(db)
     if is_email(identifier):
-        return users.find_one({"email": normalize_email(identifier)})
+        return users.find_one(
+            {"email": normalize_email(identifier)}, USER_AUTH_PROJECTION
+        )
     if is_phone_number(identifier):
-        return users.find_one({"phone_number": identifier})
+        return users.find_one({"phone_number": identifier}, USER_AUTH_PROJECTION)
     return None
 
 
+def _token_cache_key(token: str) -> bytes:
+    return blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+
+def _cached_user(token: str) -> Optional[UserDocument]:
+    with _USER_CACHE_LOCK:
+        user = _USER_CACHE.get(_token_cache_key(token))
+    # Routers may mutate the user they receive, so hand out a copy.
+    return dict(user) if user is not None else None
+
+
+def invalidate_cached_user(user_id: ObjectId) -> None:
+    with _USER_CACHE_LOCK:
+        stale = [key for key, user in _USER_CACHE.items() if user["_id"] == user_id]
+        for key in stale:
+            _USER_CACHE.pop(key, None)
+
+
 def token_subject(user: UserDocument) -> str:
     return (
         user.get("email")
@@ -40,15 +80,23 @@ def token_subject(user: UserDocument) -> str:
 
 
 def get_current_user(
+    request: Request,
     token: Optional[str] = Depends(auth.optional_oauth2_scheme),
     db: Database = Depends(get_database),
 ) -> UserDocument:
+    # Reuse the user already resolved earlier in this request.
+    cached: Optional[UserDocument] = getattr(request.state, "current_user", None)
+    if cached is not None:
+        return cached
+
     if not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Yêu cầu đăng nhập",
         )
 
+    # The token is always decoded, so signature and expiry are enforced exactly;
+    # the cache only saves the user lookup.
     identifier = auth.decode_access_token(token)
     if not identifier:
         raise HTTPException(
@@ -56,6 +104,11 @@ def get_current_user(
             detail="Token không hợp lệ",
         )
 
+    cached = _cached_user(token)
+    if cached is not None:
+        request.state.current_user = cached
+        return cached
+
     user = find_user_by_identifier(db, identifier)
     if not user:
         raise HTTPException(
@@ -67,26 +120,36 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Tài khoản đã bị khóa",
         )
+    with _USER_CACHE_LOCK:
+        _USER_CACHE[_token_cache_key(token)] = dict(user)
+    request.state.current_user = user
     return user
 
 
 def get_current_user_optional(
+    request: Request,
     token: Optional[str] = Depends(auth.optional_oauth2_scheme),
     db: Database = Depends(get_database),
 ) -> Optional[UserDocument]:
+    cached: Optional[UserDocument] = getattr(request.state, "current_user", None)
+    if cached is not None:
+        return cached
     if not token:
         return None
     identifier = auth.decode_access_token(token)
     if not identifier:
         return None
+    cached = _cached_user(token)
+    if cached is not None:
+        return cached
     return find_user_by_identifier(db, identifier)
 
 
-def require_roles(
-    roles: Iterable[str],
-    current_user: UserDocument = Depends(get_current_user),
-) -> UserDocument:
-    allowed = set(role.lower() for role in roles)
+SELLER_ROLES = frozenset({"seller", "admin"})
+BUYER_ROLES = frozenset({"buyer"})
+
+
+def _ensure_role(current_user: UserDocument, allowed: frozenset[str]) -> UserDocument:
     role = (current_user.get("role") or "buyer").lower()
     if role not in allowed:
         raise HTTPException(
@@ -96,6 +159,13 @@ def require_roles(
     return current_user
 
 
+def require_roles(
+    roles: Iterable[str],
+    current_user: UserDocument = Depends(get_current_user),
+) -> UserDocument:
+    return _ensure_role(current_user, frozenset(role.lower() for role in roles))
+
+
 def require_admin(current_user: UserDocument = Depends(get_current_user)) -> UserDocument:
     if (current_user.get("role") or "").lower() != "admin":
         raise HTTPException(
@@ -106,8 +176,8 @@ def require_admin(current_user: UserDocument = Depends(get_current_user)) -> Use
 
 
 def require_seller(current_user: UserDocument = Depends(get_current_user)) -> UserDocument:
-    return require_roles(["seller", "admin"], current_user)
+    return _ensure_role(current_user, SELLER_ROLES)
 
 
 def require_buyer(current_user: UserDocument = Depends(get_current_user)) -> UserDocument:
-    return require_roles(["buyer"], current_user)
+    return _ensure_role(current_user, BUYER_ROLES)
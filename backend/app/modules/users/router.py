@@ -3,15 +3,18 @@
 
 from __future__ import annotations
 
-from bson import ObjectId
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from fastapi import APIRouter, Depends, Response, status
 from pymongo.database import Database
 
 from ...db.models import AddressDocument, UserDocument, UserProfileDocument
 from ...db.session import get_database
+from ..common.types import PathObjectId
 from ..common.utils import utcnow
 from . import service
-from .dependencies import get_current_user, users_collection
+from .dependencies import get_current_user, invalidate_cached_user, users_collection
 from .schemas import (
     AddressCreateRequest,
     AddressListResponse,
@@ -28,50 +31,52 @@ router = APIRouter(prefix="/users", tags=["users"])
 auth_router = APIRouter(prefix="/auth", tags=["auth"])
 
 
-def _profile_to_response(user: UserDocument, profile: UserProfileDocument) -> ProfileResponse:
+# Routes return plain dicts: FastAPI validates them against ``response_model``
+# exactly once, whereas a returned model is dumped and then validated again.
+def _profile_to_response(user: UserDocument, profile: UserProfileDocument) -> Dict[str, Any]:
     created_at = profile.get("created_at") or user.get("created_at") or utcnow()
     updated_at = profile.get("updated_at") or created_at
-    return ProfileResponse(
-        id=str(user["_id"]),
-        email=user.get("email"),
-        phone_number=user.get("phone_number"),
-        full_name=profile.get("display_name"),
-        avatar_url=profile.get("avatar_url"),
-        gender=profile.get("gender"),
-        date_of_birth=profile.get("date_of_birth"),
-        bio=profile.get("bio"),
-        created_at=created_at,
-        updated_at=updated_at,
-    )
+    return {
+        "id": str(user["_id"]),
+        "email": user.get("email"),
+        "phone_number": user.get("phone_number"),
+        "full_name": profile.get("display_name"),
+        "avatar_url": profile.get("avatar_url"),
+        "gender": profile.get("gender"),
+        "date_of_birth": profile.get("date_of_birth"),
+        "bio": profile.get("bio"),
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
 
 
-def _address_to_response(address: AddressDocument) -> AddressResponse:
-    payload = AddressResponse.model_validate(
-        {
-            "_id": str(address["_id"]),
-            "user_id": str(address["user_id"]),
-            "label": address.get("label"),
-            "recipient_name": address["recipient_name"],
-            "phone_number": address["phone_number"],
-            "address_line": address["address_line"],
-            "ward": address.get("ward"),
-            "district": address.get("district"),
-            "province": address.get("province"),
-            "postal_code": address.get("postal_code"),
-            "country": address.get("country", "Việt Nam"),
-            "is_default": address.get("is_default", False),
-            "created_at": address.get("created_at", utcnow()),
-            "updated_at": address.get("updated_at", utcnow()),
-        }
-    )
-    return payload
+def _address_to_response(address: AddressDocument, now: Optional[datetime] = None) -> Dict[str, Any]:
+    if now is None:
+        now = utcnow()
+    get = address.get
+    return {
+        "_id": str(address["_id"]),
+        "user_id": str(address["user_id"]),
+        "label": get("label"),
+        "recipient_name": address["recipient_name"],
+        "phone_number": address["phone_number"],
+        "address_line": address["address_line"],
+        "ward": get("ward"),
+        "district": get("district"),
+        "province": get("province"),
+        "postal_code": get("postal_code"),
+        "country": get("country", "Việt Nam"),
+        "is_default": get("is_default", False),
+        "created_at": get("created_at") or now,
+        "updated_at": get("updated_at") or now,
+    }
 
 
 @router.get("/me", response_model=ProfileResponse)
 def get_profile(
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> ProfileResponse:
+) -> Dict[str, Any]:
     profile = service.ensure_profile(db, current_user)
     return _profile_to_response(current_user, profile)
 
@@ -81,7 +86,7 @@ def update_profile(
     payload: ProfileUpdateRequest,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> ProfileResponse:
+) -> Dict[str, Any]:
     update_payload = {
         "display_name": payload.full_name,
         "avatar_url": payload.avatar_url,
@@ -96,6 +101,7 @@ def update_profile(
             {"$set": {"phone_number": payload.phone_number}},
         )
         current_user["phone_number"] = payload.phone_number
+        invalidate_cached_user(current_user["_id"])
     profile = service.update_profile(db, current_user, update_payload)
     return _profile_to_response(current_user, profile)
 
@@ -104,12 +110,13 @@ def update_profile(
 def list_addresses(
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> AddressListResponse:
+) -> Dict[str, Any]:
+    now = utcnow()
     items = [
-        _address_to_response(address)
+        _address_to_response(address, now)
         for address in service.list_addresses(db, current_user["_id"])
     ]
-    return AddressListResponse(items=items)
+    return {"items": items}
 
 
 @router.post("/me/addresses", response_model=AddressResponse, status_code=status.HTTP_201_CREATED)
@@ -117,23 +124,19 @@ def create_address(
     payload: AddressCreateRequest,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> AddressResponse:
+) -> Dict[str, Any]:
     doc = service.create_address(db, current_user["_id"], payload.model_dump())
     return _address_to_response(doc)
 
 
 @router.put("/me/addresses/{address_id}", response_model=AddressResponse)
 def update_address(
-    address_id: str,
+    address_id: PathObjectId,
     payload: AddressUpdateRequest,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> AddressResponse:
-    try:
-        address_oid = ObjectId(address_id)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID không hợp lệ") from exc
-    doc = service.update_address(db, current_user["_id"], address_oid, payload.model_dump())
+) -> Dict[str, Any]:
+    doc = service.update_address(db, current_user["_id"], address_id, payload.model_dump())
     return _address_to_response(doc)
 
 
@@ -143,29 +146,21 @@ def update_address(
     response_class=Response,
 )
 def delete_address(
-    address_id: str,
+    address_id: PathObjectId,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
 ) -> Response:
-    try:
-        address_oid = ObjectId(address_id)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID không hợp lệ") from exc
-    service.delete_address(db, current_user["_id"], address_oid)
+    service.delete_address(db, current_user["_id"], address_id)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.post("/me/addresses/{address_id}/default", response_model=AddressResponse)
 def set_default_address(
-    address_id: str,
+    address_id: PathObjectId,
     current_user: UserDocument = Depends(get_current_user),
     db: Database = Depends(get_database),
-) -> AddressResponse:
-    try:
-        address_oid = ObjectId(address_id)
-    except Exception as exc:  # noqa: BLE001
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="ID không hợp lệ") from exc
-    doc = service.set_default_address(db, current_user["_id"], address_oid)
+) -> Dict[str, Any]:
+    doc = service.set_default_address(db, current_user["_id"], address_id)
     return _address_to_response(doc)
 
 
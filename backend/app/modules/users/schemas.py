@@ -3,16 +3,20 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, StringConstraints
+
+# Validated inside pydantic-core (Rust regex); a Python-level field_validator
+# measured slower for this check.
+PhoneNumber = Annotated[str, StringConstraints(pattern=r"^[0-9]{10,11}$")]
 
 
 class UserRegistrationRequest(BaseModel):
     email: EmailStr
     password: str = Field(min_length=6, max_length=128)
     full_name: Optional[str] = None
-    phone_number: Optional[str] = Field(default=None, pattern=r"^[0-9]{10,11}$")
+    phone_number: Optional[PhoneNumber] = None
 
 
 class UserLoginRequest(BaseModel):
@@ -45,13 +49,13 @@ class ProfileUpdateRequest(BaseModel):
     gender: Optional[str] = Field(default=None, pattern=r"^(male|female|other)$")
     date_of_birth: Optional[datetime] = None
     bio: Optional[str] = Field(default=None, max_length=400)
-    phone_number: Optional[str] = Field(default=None, pattern=r"^[0-9]{10,11}$")
+    phone_number: Optional[PhoneNumber] = None
 
 
 class AddressBase(BaseModel):
     label: Optional[str] = None
     recipient_name: str
-    phone_number: str = Field(pattern=r"^[0-9]{10,11}$")
+    phone_number: PhoneNumber
     address_line: str
     ward: Optional[str] = None
     district: Optional[str] = None
@@ -7,7 +7,7 @@ from typing import Optional
 
 from bson import ObjectId
 from fastapi import HTTPException, status
-from pymongo import ReturnDocument
+from pymongo import InsertOne, ReturnDocument, UpdateMany
 from pymongo.collection import Collection
 from pymongo.database import Database
 
@@ -17,6 +17,27 @@ from ..common.utils import is_phone_number, normalize_email, utcnow
 from .dependencies import find_user_by_identifier, token_subject, users_collection
 
 
+# Exactly the fields the address response is built from.
+ADDRESS_PROJECTION = {
+    field: 1
+    for field in (
+        "user_id",
+        "label",
+        "recipient_name",
+        "phone_number",
+        "address_line",
+        "ward",
+        "district",
+        "province",
+        "postal_code",
+        "country",
+        "is_default",
+        "created_at",
+        "updated_at",
+    )
+}
+
+
 def profiles_collection(db: Database) -> Collection:
     return db.get_collection("user_profiles")
 
@@ -30,23 +51,24 @@ def get_profile(db: Database, user_id: ObjectId) -> Optional[UserProfileDocument
 
 
 def ensure_profile(db: Database, user: UserDocument) -> UserProfileDocument:
-    coll = profiles_collection(db)
-    existing = coll.find_one({"user_id": user["_id"]})
-    if existing:
-        return existing
-
-    profile: UserProfileDocument = {
+    now = utcnow()
+    defaults: UserProfileDocument = {
         "user_id": user["_id"],
         "display_name": user.get("email") or user.get("phone_number"),
         "avatar_url": None,
         "gender": None,
         "date_of_birth": None,
         "bio": None,
-        "created_at": utcnow(),
-        "updated_at": utcnow(),
+        "created_at": now,
+        "updated_at": now,
     }
-    coll.insert_one(profile)
-    return profile
+    # Returns the existing profile untouched, or creates it with the defaults.
+    return profiles_collection(db).find_one_and_update(
+        {"user_id": user["_id"]},
+        {"$setOnInsert": defaults},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
 
 
 def update_profile(
@@ -54,9 +76,12 @@ def update_profile(
     user: UserDocument,
     payload: dict,
 ) -> UserProfileDocument:
+    update_fields = {k: v for k, v in payload.items() if v is not None}
+    if not update_fields:
+        # Nothing to change: skip the write and keep updated_at as it was.
+        return ensure_profile(db, user)
     coll = profiles_collection(db)
     now = utcnow()
-    update_fields = {k: v for k, v in payload.items() if v is not None}
     update_fields["updated_at"] = now
     result = coll.find_one_and_update(
         {"user_id": user["_id"]},
@@ -68,12 +93,22 @@ def update_profile(
 
 
 def list_addresses(db: Database, user_id: ObjectId) -> list[AddressDocument]:
-    cursor = addresses_collection(db).find({"user_id": user_id}).sort(
+    cursor = addresses_collection(db).find({"user_id": user_id}, ADDRESS_PROJECTION).sort(
         [("is_default", -1), ("updated_at", -1)]
     )
     return list(cursor)
 
 
+def _settle_default(coll: Collection, user_id: ObjectId, default_id: ObjectId) -> None:
+    # One pipeline write over the chosen address and every row still flagged as
+    # default: the chosen one is (re)asserted and the rest cleared, so when two
+    # requests race the last pass wins instead of both clearing each other.
+    coll.update_many(
+        {"user_id": user_id, "$or": [{"_id": default_id}, {"is_default": True}]},
+        [{"$set": {"is_default": {"$eq": ["$_id", default_id]}}}],
+    )
+
+
 def get_address_by_id(db: Database, user_id: ObjectId, address_id: ObjectId) -> AddressDocument:
     address = addresses_collection(db).find_one({"_id": address_id, "user_id": user_id})
     if not address:
@@ -103,13 +138,12 @@ def create_address(
         "created_at": now,
         "updated_at": now,
     }
-    result = coll.insert_one(address)
-    address["_id"] = result.inserted_id
+    ops: list = [InsertOne(address)]
     if address["is_default"]:
-        coll.update_many(
-            {"user_id": user_id, "_id": {"$ne": address["_id"]}},
-            {"$set": {"is_default": False}},
-        )
+        # Clear the previous default in the same round-trip; it runs first so the
+        # new document is never caught by the reset. InsertOne fills in address["_id"].
+        ops.insert(0, UpdateMany({"user_id": user_id, "is_default": True}, {"$set": {"is_default": False}}))
+    coll.bulk_write(ops, ordered=True)
     return address
 
 
@@ -131,10 +165,7 @@ def update_address(
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Địa chỉ không tồn tại")
 
     if payload.get("is_default"):
-        coll.update_many(
-            {"user_id": user_id, "_id": {"$ne": address_id}},
-            {"$set": {"is_default": False}},
-        )
+        _settle_default(coll, user_id, address_id)
     return result
 
 
@@ -155,10 +186,7 @@ def set_default_address(db: Database, user_id: ObjectId, address_id: ObjectId) -
     if not updated:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Địa chỉ không tồn tại")
 
-    coll.update_many(
-        {"user_id": user_id, "_id": {"$ne": address_id}},
-        {"$set": {"is_default": False}},
-    )
+    _settle_default(coll, user_id, address_id)
     return updated
 
 
@@ -208,8 +236,14 @@ def authenticate_user(
     password: str,
 ) -> UserDocument:
     user = find_user_by_identifier(db, identifier)
-    if not user or not auth.verify_password(password, user["hashed_password"]):
+    if not user:
+        auth.dummy_verify_password(password)
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Thông tin đăng nhập không chính xác")
+    verified, new_hash = auth.verify_and_update_password(password, user["hashed_password"])
+    if not verified:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Thông tin đăng nhập không chính xác")
+    if new_hash:
+        users_collection(db).update_one({"_id": user["_id"]}, {"$set": {"hashed_password": new_hash}})
     if not user.get("is_active", True):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Tài khoản bị khóa")
     return user
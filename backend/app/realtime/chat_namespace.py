@@ -9,7 +9,7 @@ import socketio
 
 from ..db.session import get_database
 from ..modules.chat import service as chat_service
-from ..modules.chat.utils import message_response_from_doc, thread_response_from_doc
+from ..modules.chat.utils import message_dict_from_doc, thread_dict_from_doc
 from ..modules.users.dependencies import find_user_by_identifier
 from ..services import auth
 from .manager import emit_to_thread, thread_room
@@ -17,11 +17,17 @@ from .manager import emit_to_thread, thread_room
 
 def _session_user(session: Dict[str, Any]) -> Dict[str, Any]:
     return {
-        "_id": ObjectId(session["user_id"]),
+        "_id": session["user_oid"],
         "role": session.get("role", "buyer"),
     }
 
 
+def _thread_object_id(session: Dict[str, Any], thread_id: str) -> ObjectId:
+    """Return the thread's ObjectId, reusing the one parsed earlier in this session."""
+    cached = session["thread_ids"].get(thread_id)
+    return cached if cached is not None else ObjectId(thread_id)
+
+
 def _error_message(exc: Exception) -> str:
     detail = getattr(exc, "detail", None)
     if isinstance(detail, str):
@@ -55,7 +61,10 @@ class ChatNamespace(socketio.AsyncNamespace):
             sid,
             {
                 "user_id": str(user["_id"]),
+                "user_oid": user["_id"],
                 "role": (user.get("role") or "buyer").lower(),
+                # Threads this socket has already been granted access to.
+                "thread_ids": {},
             },
         )
 
@@ -67,7 +76,7 @@ class ChatNamespace(socketio.AsyncNamespace):
         user = _session_user(session)
         db = get_database()
         threads = chat_service.list_threads_for_user(db, user)
-        payload = [thread_response_from_doc(doc).model_dump(mode="json") for doc in threads]
+        payload = [thread_dict_from_doc(doc) for doc in threads]
         await self.emit("chat:threads", {"items": payload}, to=sid)
 
     async def on_chat_join(self, sid: str, data: Dict[str, Any]) -> None:
@@ -81,16 +90,19 @@ class ChatNamespace(socketio.AsyncNamespace):
         user = _session_user(session)
 
         try:
-            thread = chat_service.ensure_user_access_to_thread(db, ObjectId(thread_id), user)
+            thread = chat_service.ensure_user_access_to_thread(
+                db, _thread_object_id(session, thread_id), user
+            )
         except Exception as exc:  # noqa: BLE001
             await self.emit("chat:error", {"message": _error_message(exc)}, to=sid)
             return
+        session["thread_ids"][thread_id] = thread["_id"]
 
         await self.enter_room(sid, thread_room(thread_id))
         messages = chat_service.list_messages(db, thread["_id"], limit=50)
         response = {
-            "thread": thread_response_from_doc(thread).model_dump(mode="json"),
-            "messages": [message_response_from_doc(msg).model_dump(mode="json") for msg in reversed(messages)],
+            "thread": thread_dict_from_doc(thread),
+            "messages": [message_dict_from_doc(msg) for msg in reversed(messages)],
         }
         await self.emit("chat:joined", response, to=sid)
 
@@ -114,10 +126,13 @@ class ChatNamespace(socketio.AsyncNamespace):
         user = _session_user(session)
 
         try:
-            thread = chat_service.ensure_user_access_to_thread(db, ObjectId(thread_id), user)
+            thread = chat_service.ensure_user_access_to_thread(
+                db, _thread_object_id(session, thread_id), user
+            )
         except Exception as exc:  # noqa: BLE001
             await self.emit("chat:error", {"message": _error_message(exc)}, to=sid)
             return
+        session["thread_ids"][thread_id] = thread["_id"]
 
         message = chat_service.add_message(
             db=db,
@@ -127,5 +142,5 @@ class ChatNamespace(socketio.AsyncNamespace):
             content=content,
             attachments=[],
         )
-        payload = message_response_from_doc(message).model_dump(mode="json")
+        payload = message_dict_from_doc(message)
         await emit_to_thread("chat:message", thread_id, payload)
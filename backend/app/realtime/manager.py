@@ -2,13 +2,27 @@
 
 from __future__ import annotations
 
+from functools import lru_cache
 from typing import Any, Optional
 
+import orjson
 import socketio
 
 _server: Optional[socketio.AsyncServer] = None
 
 
+class ORJSONCodec:
+    """``json``-compatible codec so Socket.IO packets are encoded by orjson."""
+
+    @staticmethod
+    def dumps(obj: Any, **_: Any) -> str:
+        return orjson.dumps(obj).decode("utf-8")
+
+    @staticmethod
+    def loads(data: str | bytes, **_: Any) -> Any:
+        return orjson.loads(data)
+
+
 def set_socket_server(server: socketio.AsyncServer) -> None:
     global _server
     _server = server
@@ -18,6 +32,7 @@ def get_socket_server() -> Optional[socketio.AsyncServer]:
     return _server
 
 
+@lru_cache(maxsize=4096)
 def thread_room(thread_id: str) -> str:
     return f"thread:{thread_id}"
 
@@ -26,5 +41,6 @@ async def emit_to_thread(event: str, thread_id: str, payload: Any) -> None:
     server = get_socket_server()
     if server is None:
         return
+    # The packet is encoded once and the same frame is sent to every room member.
     await server.emit(event, payload, room=thread_room(thread_id))
 
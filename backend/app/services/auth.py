@@ -3,6 +3,7 @@
 import hashlib
 import secrets
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import Optional
 
 from fastapi.security import OAuth2PasswordBearer
@@ -13,9 +14,15 @@ from ..config import get_settings
 
 settings = get_settings()
 
+# New hashes use argon2id; existing pbkdf2 hashes still verify and are
+# upgraded transparently on the next successful login.
 pwd_context = CryptContext(
-    schemes=["pbkdf2_sha256"],
+    schemes=["argon2", "pbkdf2_sha256"],
     deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=2,
+    argon2__memory_cost=64 * 1024,
+    argon2__parallelism=1,
     pbkdf2_sha256__rounds=36000,
 )
 
@@ -34,6 +41,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash when its scheme or cost is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+@lru_cache(maxsize=1)
+def _dummy_hash() -> str:
+    return pwd_context.hash(secrets.token_urlsafe(16))
+
+
+def dummy_verify_password(plain_password: str) -> None:
+    """Spend the same time as a real verify so unknown accounts are not distinguishable."""
+    pwd_context.verify(plain_password, _dummy_hash())
+
+
 def create_access_token(subject: str) -> str:
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     payload = {"sub": subject, "exp": expire}